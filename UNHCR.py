@@ -7,11 +7,20 @@
 import requests
 import json
 import csv
+import sqlite3
+import pandas as pd
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib import font_manager, rc
 from datetime import datetime
 from collections import Counter
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from googletrans import Translator
 from konlpy.tag import Okt
+from url_resolver import normalize_url, ensure_link_key_column
+from rate_limit import get_limiter, call_with_retry
+from change_feed import init_change_log
+from unified_store import insert_articles
 
 NAVER_CLIENT_ID = "KHG6B47JKqTFQWmugqCK"
 NAVER_CLIENT_SECRET = "V_bPvO06sv"
@@ -33,14 +42,21 @@ def get_naver_news(query, display=20):
         "X-Naver-Client-Id": NAVER_CLIENT_ID,
         "X-Naver-Client-Secret": NAVER_CLIENT_SECRET,
     }
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()['items']
+
+    def request():
+        response = requests.get(url, headers=headers, timeout=10)
+        response.raise_for_status()
+        return response.json()['items']
+
+    # 429/일시 오류는 지수 백오프로 재시도, 연속 실패 시 서킷 브레이커가 호출을 중단
+    return call_with_retry('naver', request)
 
 def init_db(db_path):
     """데이터베이스 초기화 함수: 'articles' 테이블 생성"""
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
+        # WAL 모드: API/차트 등 읽기 연결이 열려 있어도 수집기의 commit 이 막히지 않음
+        cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS articles (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -48,9 +64,12 @@ def init_db(db_path):
                 final_query TEXT NOT NULL,
                 title TEXT NOT NULL,
                 original_link TEXT NOT NULL UNIQUE,
-                sentiment_score REAL NOT NULL
+                sentiment_score REAL NOT NULL,
+                link_key TEXT
             )
         ''')
+        ensure_link_key_column(cursor, 'original_link')
+        init_change_log(cursor)
         conn.commit()
 
 def analyze_and_process_articles(articles, final_query, db_path):
@@ -63,6 +82,7 @@ def analyze_and_process_articles(articles, final_query, db_path):
     analyzer = SentimentIntensityAnalyzer()
     translator = Translator()
     okt = Okt()
+    translate_limiter = get_limiter('translate')
 
     total_compound_score = 0
     article_count = 0
@@ -70,15 +90,20 @@ def analyze_and_process_articles(articles, final_query, db_path):
     new_article_count = 0
 
     print("\n--- 개별 뉴스 분석 및 결과 저장 ---")
+    seen_keys = set()
+    stored_rows = []
     
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
         for article in articles:
             try:
+                # 링크는 원본 그대로 저장하고, 중복 판별은 정규화한 link_key 로 (Google 수집분과 같은 형식)
                 link = article.get('originallink', '')
-                if not link: continue
+                link_key = normalize_url(link)
+                if not link or link_key in seen_keys: continue
+                seen_keys.add(link_key)
 
-                cursor.execute("SELECT id FROM articles WHERE original_link = ?", (link,))
+                cursor.execute("SELECT id FROM articles WHERE link_key = ? OR original_link = ?", (link_key, link))
                 if cursor.fetchone() is not None:
                     continue
 
@@ -88,7 +113,7 @@ def analyze_and_process_articles(articles, final_query, db_path):
                 
                 all_descriptions += description + " "
 
-                translated_text = translator.translate(description, src='ko', dest='en').text
+                translated_text = translate_limiter.call(translator.translate, description, src='ko', dest='en').text
                 vs = analyzer.polarity_scores(translated_text)
                 compound_score = vs['compound']
                 
@@ -102,9 +127,14 @@ def analyze_and_process_articles(articles, final_query, db_path):
                 # 3. DB에 저장
                 now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 cursor.execute(
-                    "INSERT INTO articles (search_timestamp, final_query, title, original_link, sentiment_score) VALUES (?, ?, ?, ?, ?)",
-                    (now, final_query, title, link, compound_score)
+                    "INSERT INTO articles (search_timestamp, final_query, title, original_link, sentiment_score, link_key) VALUES (?, ?, ?, ?, ?, ?)",
+                    (now, final_query, title, link, compound_score, link_key)
                 )
+                stored_rows.append({
+                    'source': 'naver', 'search_timestamp': now, 'final_query': final_query,
+                    'title': title, 'description': description, 'link': link,
+                    'published_date': article.get('pubDate'), 'sentiment_score': compound_score,
+                })
 
             except Exception as e:
                 print(f"오류 발생으로 기사 하나를 건너뜁니다: {e}")
@@ -113,6 +143,12 @@ def analyze_and_process_articles(articles, final_query, db_path):
     
     print(f"\n>> 총 {new_article_count}개의 새로운 기사를 DB에 저장했습니다.")
 
+    # 통합 저장소(월별 샤드)에도 같은 기사를 저장
+    try:
+        insert_articles(stored_rows)
+    except Exception as e:
+        print(f"통합 저장소 저장 중 오류: {e}")
+
     nouns = okt.nouns(all_descriptions)
     filtered_nouns = [n for n in nouns if len(n) > 1]
     
@@ -121,9 +157,8 @@ def analyze_and_process_articles(articles, final_query, db_path):
     
     return average_score, top_keywords
 
-def visualize_trends(db_path):
-    keyword = input("\n[시계열 분석] 분석하고 싶은 키워드를 입력하세요 (전체는 Enter): ")
-
+def load_daily_stats(db_path, keyword=''):
+    """DB에서 일별 언급량과 평균 감성 점수를 집계"""
     with sqlite3.connect(db_path) as conn:
         query = "SELECT search_timestamp, sentiment_score FROM articles"
         params = []
@@ -134,16 +169,17 @@ def visualize_trends(db_path):
         df = pd.read_sql_query(query, conn, params=params)
 
     if df.empty:
-        print("해당 키워드에 대한 데이터가 없습니다.")
-        return
+        return df
 
     df['date'] = pd.to_datetime(df['search_timestamp']).dt.date
     daily_stats = df.groupby('date').agg(
         mention_count=('sentiment_score', 'count'),
         avg_sentiment=('sentiment_score', 'mean')
     ).reset_index()
+    return daily_stats
 
-    # 시각화
+def plot_trends(daily_stats, keyword=''):
+    """일별 집계 결과로 트렌드 그래프(Figure)를 생성"""
     fig, ax1 = plt.subplots(figsize=(12, 6))
 
     ax1.bar(daily_stats['date'], daily_stats['mention_count'], color='skyblue', label='일일 언급량(기사 수)')
@@ -164,6 +200,18 @@ def visualize_trends(db_path):
     fig.tight_layout()
     fig.legend(loc='upper right', bbox_to_anchor=(1,1), bbox_transform=ax1.transAxes)
     plt.grid(True, axis='y', linestyle=':', alpha=0.6)
+    return fig
+
+def visualize_trends(db_path):
+    keyword = input("\n[시계열 분석] 분석하고 싶은 키워드를 입력하세요 (전체는 Enter): ")
+
+    daily_stats = load_daily_stats(db_path, keyword)
+    if daily_stats.empty:
+        print("해당 키워드에 대한 데이터가 없습니다.")
+        return
+
+    # 시각화
+    plot_trends(daily_stats, keyword)
     
     print("\n분석 그래프를 출력합니다. (그래프 창을 닫으면 프로그램이 종료됩니다.)")
     plt.show()
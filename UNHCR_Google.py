@@ -5,6 +5,7 @@
 
 
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from collections import Counter
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
@@ -14,15 +15,24 @@ import platform
 import sqlite3
 from matplotlib import font_manager, rc 
 import matplotlib.pyplot as plt
-from gnews import GNews
+import feedparser
+import urllib.request
+from urllib.parse import urlencode
 import time
 import random
+from url_resolver import resolve_canonical_urls, normalize_url, ensure_link_key_column
+from rate_limit import get_limiter, backoff_delay, is_retryable_error, CircuitOpenError
+from change_feed import init_change_log
+from query_planner import plan_queries, record_query_run
+from unified_store import insert_articles
 
 
 # In[ ]:
 
 
 DB_FILE = "google_news_monitoring.db"
+KEYWORD_CHUNK_SIZE = 2000
+MAX_KEYWORD_VOCABULARY = 50000  # 집계 중 유지할 최대 키워드 수 (None이면 제한 없음)
 
 os_name = platform.system()
 if os_name == 'Windows':
@@ -43,42 +53,90 @@ if font_name:
 else:
     print("지원되지 않는 OS입니다. 폰트 설정이 필요합니다.")
 
-def get_google_news(query, max_results=50, period='7d'):
-
-    print(f"Searching Google News for: '{query}' (period: {period})")
-    
-    google_news = GNews(
-        language='ko', 
-        country='KR', 
-        period=period,
-        max_results=max_results,
-        exclude_websites=['youtube.com', 'facebook.com'] 
+GOOGLE_NEWS_RSS_URL = "https://news.google.com/rss/search"
+EXCLUDED_WEBSITES = ['youtube.com', 'facebook.com']
+
+def fetch_google_news_rss(query, max_results=50, period='7d'):
+    """
+    Google News RSS 검색 결과를 GNews 와 같은 형식의 dict 리스트로 반환합니다.
+    HTTP 오류(429, 5xx 등)는 예외로 그대로 전달되어 rate limiter 가 감지합니다.
+    """
+    search_query = f"{query} when:{period}" if period else query
+    params = {'q': search_query, 'hl': 'ko', 'gl': 'KR', 'ceid': 'KR:ko'}
+    request = urllib.request.Request(
+        f"{GOOGLE_NEWS_RSS_URL}?{urlencode(params)}",
+        headers={'User-Agent': 'Mozilla/5.0 (compatible; UNHCR-Monitoring/1.0)'}
     )
-    
-    max_retries = 3
+    with urllib.request.urlopen(request, timeout=15) as response:
+        feed = feedparser.parse(response.read())
+    if feed.bozo and not feed.entries:
+        raise ValueError(f"Invalid RSS response: {feed.bozo_exception}")
+
+    articles = []
+    for entry in feed.entries:
+        source = entry.get('source', {})
+        if any(site in source.get('href', '') for site in EXCLUDED_WEBSITES):
+            continue
+        articles.append({
+            'title': entry.get('title', ''),
+            'description': entry.get('summary', ''),
+            'published date': entry.get('published', ''),
+            'url': entry.get('link', ''),
+            'publisher': {'href': source.get('href', ''), 'title': source.get('title', '')},
+        })
+        if len(articles) >= max_results:
+            break
+    return articles
+
+class SearchFailedError(Exception):
+    """재시도를 모두 실패했거나 서킷이 열려 검색 결과를 얻지 못한 경우 (결과 0건과 구분)"""
+
+# 결과가 없을 때 순서대로 넓혀 갈 검색 기간 (None 은 전체 기간)
+SEARCH_PERIODS = ['7d', '30d', None]
+
+def _search_period(limiter, query, max_results, period, max_retries=3):
+    """한 기간에 대해 일시적 오류만 재시도하며 검색. 실패하면 None (결과 0건은 [])"""
     for attempt in range(max_retries):
         try:
-            articles = google_news.get_news(query)
+            articles = limiter.call(fetch_google_news_rss, query, max_results, period)
             print(f"Found {len(articles)} articles (attempt {attempt + 1})")
-            
-            if articles:
-                return articles
-            else:
-                if period == '7d' and attempt < max_retries - 1:
-                    print("7일 기간에서 결과가 없어 30일로 확장합니다...")
-                    google_news.period = '30d'
-                elif period == '30d' and attempt < max_retries - 1:
-                    print("30일 기간에서 결과가 없어 전체 기간으로 확장합니다...")
-                    google_news.period = None
-                    
+            return articles
+        except CircuitOpenError as e:
+            print(e)
+            return None
         except Exception as e:
             print(f"Attempt {attempt + 1} failed: {e}")
+            if not is_retryable_error(e):
+                return None
             if attempt < max_retries - 1:
-                wait_time = (attempt + 1) * 2
-                print(f"Waiting {wait_time} seconds before retry...")
+                wait_time = backoff_delay(attempt, base=2.0)
+                print(f"Waiting {wait_time:.1f} seconds before retry...")
                 time.sleep(wait_time)
-            
+    return None
+
+def get_google_news(query, max_results=50, period='7d', raise_on_failure=False):
+    """
+    결과가 없으면 기간을 7일 -> 30일 -> 전체로 넓혀 다시 검색합니다.
+    재시도는 기간마다 따로 세므로, 일시적 오류가 있어도 기간 확장이 중간에 끊기지 않습니다.
+    검색 자체가 실패하면 빈 리스트를 반환하고, raise_on_failure=True 이면 SearchFailedError 를 던집니다.
+    """
+    limiter = get_limiter('gnews')
+    periods = SEARCH_PERIODS[SEARCH_PERIODS.index(period):] if period in SEARCH_PERIODS else [period]
+    for current in periods:
+        print(f"Searching Google News for: '{query}' (period: {current})")
+        articles = _search_period(limiter, query, max_results, current)
+        if articles is None:
+            break
+        if articles:
+            return articles
+        if current == periods[-1]:
+            # 전체 기간까지 검색했는데 결과가 없으면 실패가 아니라 결과 0건
+            return []
+        print(f"{current} 기간에서 결과가 없어 검색 기간을 확장합니다...")
+
     print("모든 재시도 실패")
+    if raise_on_failure:
+        raise SearchFailedError(f"Google News search failed for '{query}'")
     return []
 
 def create_flexible_queries(base_query):
@@ -109,9 +167,10 @@ def create_flexible_queries(base_query):
         for keyword in keyword_group[:2]:
             queries.append(f"{base_query} {keyword}")
     
-    return list(set(queries)) 
+    # set() 은 프로세스마다 순서가 달라지므로(해시 무작위화) 입력 순서를 유지하며 중복 제거
+    return list(dict.fromkeys(queries))
 
-def test_search_queries(base_query):
+def test_search_queries(base_query, db_path=DB_FILE):
 
     test_queries = create_flexible_queries(base_query)
     
@@ -124,16 +183,23 @@ def test_search_queries(base_query):
     ]
     
     test_queries.extend(additional_queries)
-    test_queries = list(set(test_queries)) 
+    test_queries = list(dict.fromkeys(test_queries))
     
-    print(f"\n=== Testing {len(test_queries)} different search patterns ===")
+    # 과거 실행에서 새 URL을 거의 추가하지 못한 검색어 변형은 건너뜀
+    planned_queries, skipped_queries = plan_queries(base_query, test_queries, db_path, always=[base_query])
+    
+    print(f"\n=== Testing {len(planned_queries)} different search patterns "
+          f"(skipping {len(skipped_queries)} low-yield variants) ===")
     results = {}
+    fetched_urls = {}
+    failed_queries = []
     
-    for i, query in enumerate(test_queries, 1):
+    for i, query in enumerate(planned_queries, 1):
         try:
-            print(f"\n[Test {i}/{len(test_queries)}] Query: '{query}'")
-            articles = get_google_news(query, max_results=20)  
+            print(f"\n[Test {i}/{len(planned_queries)}] Query: '{query}'")
+            articles = get_google_news(query, max_results=20, raise_on_failure=True)
             results[query] = len(articles)
+            fetched_urls[query] = [normalize_url(article.get('url', '')) for article in articles]
             
             if articles:
                 print(f"  -> Found {len(articles)} articles.")
@@ -141,23 +207,32 @@ def test_search_queries(base_query):
                 print(f"  Example: {first_title[:60]}...")
             else:
                 print(f"  -> No results found.")
-                
-            time.sleep(1)
             
         except Exception as e:
+            # 실패한 검색은 결과 0건과 다르므로 통계에 반영하지 않음
             print(f"  Error: {e}")
-            results[query] = 0
+            failed_queries.append(query)
+            
+    unique_count = record_query_run(db_path, base_query, fetched_urls, skipped_queries)
             
     print("\n=== Search Test Summary ===")
     sorted_results = sorted(results.items(), key=lambda x: x[1], reverse=True)
     for query, count in sorted_results:
         print(f"'{query}': {count} articles")
+    print(f"\n>> {unique_count} unique articles from {len(fetched_urls)} searches; "
+          f"query planner saved {len(skipped_queries)} of {len(test_queries)} fetches.")
+    if skipped_queries:
+        print(f"   Skipped: {', '.join(repr(q) for q in skipped_queries)}")
+    if failed_queries:
+        print(f"   Failed (not recorded): {', '.join(repr(q) for q in failed_queries)}")
     
     return dict(sorted_results)
 
 def init_db(db_path):
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
+        # WAL 모드: API/차트 등 읽기 연결이 열려 있어도 수집기의 commit 이 막히지 않음
+        cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS articles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -168,16 +243,24 @@ def init_db(db_path):
             link TEXT NOT NULL UNIQUE,
             published_date TEXT,
             sentiment_score REAL NOT NULL,
-            publisher TEXT
+            publisher TEXT,
+            link_key TEXT
             )
         ''')
+        ensure_link_key_column(cursor, 'link')
+        init_change_log(cursor)
         conn.commit()
 
+_okt = None
+
 def extract_keywords(text):
     """키워드 추출 함수 개선"""
+    global _okt
     try:
-        okt = Okt()
-        nouns = okt.nouns(text)
+        # 형태소 분석기(JVM) 초기화 비용이 크므로 한 번만 생성해서 재사용
+        if _okt is None:
+            _okt = Okt()
+        nouns = _okt.nouns(text)
         filtered_nouns = [n for n in nouns if len(n) > 1 and not n.isdigit()]
         return filtered_nouns
     except Exception as e:
@@ -187,6 +270,7 @@ def extract_keywords(text):
 def analyze_and_process_articles(articles, final_query, db_path):
     translator = Translator()
     analyzer = SentimentIntensityAnalyzer()
+    translate_limiter = get_limiter('translate')
     
     total_compound_score = 0
     article_count = 0
@@ -195,15 +279,24 @@ def analyze_and_process_articles(articles, final_query, db_path):
     
     print("\n--- Analyzing new articles and saving to database ---")
     
+    # news.google.com 리다이렉트 URL을 실제 기사 URL로 변환한 뒤 중복 검사
+    canonical_links = resolve_canonical_urls([article.get('url', '') for article in articles], db_path)
+    seen_keys = set()
+    stored_rows = []
+    
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
         for i, article in enumerate(articles, 1):
             try: 
-                link = article.get('url', '')
-                if not link: 
+                raw_link = article.get('url', '')
+                link = canonical_links.get(raw_link, raw_link)
+                link_key = normalize_url(link)
+                if not link or link_key in seen_keys: 
                     continue
+                seen_keys.add(link_key)
                     
-                cursor.execute("SELECT id FROM articles WHERE link = ?", (link,))
+                # 이전 버전은 리다이렉트 URL을 그대로 저장했으므로 원본 URL로도 확인
+                cursor.execute("SELECT id FROM articles WHERE link_key = ? OR link IN (?, ?)", (link_key, link, raw_link))
                 if cursor.fetchone() is not None:
                     continue
                     
@@ -219,7 +312,7 @@ def analyze_and_process_articles(articles, final_query, db_path):
                 all_descriptions += analysis_text + " "
                 
                 try:
-                    translated_text = translator.translate(analysis_text[:500], src='ko', dest='en').text  # 길이 제한
+                    translated_text = translate_limiter.call(translator.translate, analysis_text[:500], src='ko', dest='en').text  # 길이 제한
                     vs = analyzer.polarity_scores(translated_text)
                     compound_score = vs['compound']
                 except Exception as trans_error:
@@ -236,12 +329,14 @@ def analyze_and_process_articles(articles, final_query, db_path):
                 
                 now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                 cursor.execute(
-                    "INSERT INTO articles (search_timestamp, final_query, title, description, link, published_date, sentiment_score, publisher) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                    (now, final_query, title, description, link, published_date, compound_score, publisher)
+                    "INSERT INTO articles (search_timestamp, final_query, title, description, link, published_date, sentiment_score, publisher, link_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (now, final_query, title, description, link, published_date, compound_score, publisher, link_key)
                 )
-                
-               
-                time.sleep(0.5)
+                stored_rows.append({
+                    'source': 'google', 'search_timestamp': now, 'final_query': final_query,
+                    'title': title, 'description': description, 'link': link,
+                    'published_date': published_date, 'sentiment_score': compound_score, 'publisher': publisher,
+                })
                 
             except Exception as e:
                 print(f"Skipping article {i} due to error: {e}")
@@ -251,6 +346,12 @@ def analyze_and_process_articles(articles, final_query, db_path):
                       
     print(f"\n>> Saved {new_article_count} new articles to the database.")
     
+    # 통합 저장소(월별 샤드)에도 같은 기사를 저장
+    try:
+        insert_articles(stored_rows)
+    except Exception as e:
+        print(f"통합 저장소 저장 중 오류: {e}")
+    
 
     if all_descriptions:
         nouns = extract_keywords(all_descriptions)
@@ -262,60 +363,133 @@ def analyze_and_process_articles(articles, final_query, db_path):
                       
     return average_score, top_keywords
 
+def _prune_vocabulary(keyword_ids, arrays, keep_count):
+    """
+    등장 횟수 상위 keep_count 개 키워드만 남기고 id를 0부터 다시 매깁니다.
+    arrays 는 (frequencies, article_counts, score_sums) 이며 제자리에서 압축됩니다.
+    """
+    frequencies = arrays[0]
+    size = len(keyword_ids)
+    keep = np.sort(np.argsort(-frequencies[:size], kind='stable')[:keep_count])
+    words = list(keyword_ids)
+    for array in arrays:
+        kept = array[keep]
+        array[:] = 0
+        array[:len(keep)] = kept
+    return {words[i]: new_id for new_id, i in enumerate(keep)}
+
+def compute_keyword_sentiments(db_path, top_n=10, chunk_size=KEYWORD_CHUNK_SIZE,
+                               max_vocabulary=MAX_KEYWORD_VOCABULARY):
+    """
+    DB 전체 기사에서 상위 키워드와 키워드별 평균 감성 점수를 계산합니다 (점수 내림차순).
+    기사를 chunk_size 개씩 읽으면서 한 번의 순회로 집계하므로, 메모리 사용량은
+    전체 기사 수가 아니라 chunk 크기와 키워드 어휘 수에 비례합니다.
+    어휘가 max_vocabulary 를 넘으면 chunk 가 끝날 때 등장 횟수 하위 키워드를 버려
+    절반으로 줄입니다. 이때 버려진 키워드가 다시 나오면 0부터 다시 집계하므로,
+    상위 키워드의 순위와 평균은 근사값이 될 수 있습니다 (max_vocabulary=None 이면 정확하지만
+    메모리가 어휘 수에 따라 계속 늘어남).
+    키워드별 평균은 해당 키워드가 명사로 추출된 기사들의 평균 점수입니다.
+    """
+    keyword_ids = {}
+    capacity = 1024
+    frequencies = np.zeros(capacity, dtype=np.int64)   # 키워드 등장 횟수
+    article_counts = np.zeros(capacity, dtype=np.int32)  # 키워드가 포함된 기사 수
+    score_sums = np.zeros(capacity, dtype=np.float64)  # 키워드가 포함된 기사의 감성 점수 합
+    total_rows = 0
+
+    with sqlite3.connect(db_path) as conn:
+        chunks = pd.read_sql_query(
+            "SELECT title, description, sentiment_score FROM articles", conn,
+            chunksize=chunk_size, dtype={'sentiment_score': 'float32'}
+        )
+        for chunk in chunks:
+            total_rows += len(chunk)
+            texts = chunk['title'].fillna('') + ' ' + chunk['description'].fillna('')
+            for text, score in zip(texts.tolist(), chunk['sentiment_score'].to_numpy()):
+                nouns = extract_keywords(text)
+                if not nouns:
+                    continue
+                ids = []
+                for noun in nouns:
+                    keyword_id = keyword_ids.get(noun)
+                    if keyword_id is None:
+                        keyword_id = keyword_ids[noun] = len(keyword_ids)
+                    ids.append(keyword_id)
+
+                if len(keyword_ids) > capacity:
+                    # 어휘가 늘어나면 배열을 두 배로 확장 (새 구간은 0으로 초기화)
+                    old_capacity, capacity = capacity, max(capacity * 2, len(keyword_ids))
+                    frequencies = np.concatenate([frequencies, np.zeros(capacity - old_capacity, dtype=np.int64)])
+                    article_counts = np.concatenate([article_counts, np.zeros(capacity - old_capacity, dtype=np.int32)])
+                    score_sums = np.concatenate([score_sums, np.zeros(capacity - old_capacity, dtype=np.float64)])
+
+                np.add.at(frequencies, ids, 1)
+                unique_ids = np.unique(ids)
+                article_counts[unique_ids] += 1
+                score_sums[unique_ids] += score
+
+            if max_vocabulary is not None and len(keyword_ids) > max_vocabulary:
+                keyword_ids = _prune_vocabulary(
+                    keyword_ids, (frequencies, article_counts, score_sums), max(top_n, max_vocabulary // 2)
+                )
+
+    if total_rows == 0:
+        print("No data in the database to analyze.")
+        return []
+
+    vocabulary = np.array(list(keyword_ids), dtype=object)
+    top_ids = np.argsort(-frequencies[:len(vocabulary)], kind='stable')[:top_n]
+    top_keywords = vocabulary[top_ids].tolist()
+                  
+    if not top_keywords:
+        print("Could not find any keywords to analyze.")
+        return []
+    
+    print(f"\n>> Top {len(top_keywords)} keywords for analysis: {', '.join(top_keywords)}")
+          
+    keyword_sentiments = {
+        vocabulary[i]: float(score_sums[i] / article_counts[i])
+        for i in top_ids if article_counts[i] > 0
+    }
+          
+    if not keyword_sentiments:
+        print("키워드별 감성 분석 데이터를 찾을 수 없습니다.")
+        return []
+        
+    return sorted(keyword_sentiments.items(), key=lambda item: item[1], reverse=True)
+
+def plot_keyword_sentiments(sorted_sentiments):
+    """키워드별 평균 감성 점수 막대 그래프(Figure)를 생성"""
+    keywords = [item[0] for item in sorted_sentiments]
+    scores = [item[1] for item in sorted_sentiments]
+    
+    fig = plt.figure(figsize=(12, 8))
+    bars = plt.bar(keywords, scores, color='skyblue')
+    plt.axhline(0, color='gray', linewidth=0.8, linestyle='--')
+          
+    plt.title('Top 10 Keywords AVG Sentiment Score', fontsize=16)
+    plt.xlabel('Keyword', fontsize=12)
+    plt.ylabel('AVG Sentiment Score (Neg/Pos)', fontsize=12)
+    plt.xticks(rotation=45, ha='right')
+    plt.grid(True, axis='y', linestyle=':', alpha=0.6)
+          
+    for bar in bars:
+        yval = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2.0, yval, f'{yval:.3f}', 
+                va='bottom' if yval >= 0 else 'top', ha='center')
+          
+    plt.tight_layout()
+    return fig
+
 def visualize_top_keywords_sentiment(db_path):
 
     print("\n[Keyword Sentiment Analysis] Analyzing all data in the DB to generate a graph...")
     try:
-        with sqlite3.connect(db_path) as conn:
-            df = pd.read_sql_query("SELECT title, description, sentiment_score FROM articles", conn)
-                      
-        if df.empty:
-            print("No data in the database to analyze.")
+        sorted_sentiments = compute_keyword_sentiments(db_path)
+        if not sorted_sentiments:
             return
-        
-        all_text = ' '.join((df['title'] + ' ' + df['description'].fillna('')).tolist())
-        nouns = extract_keywords(all_text)
-        top_10_keywords = [keyword for keyword, count in Counter(nouns).most_common(10)]
-                      
-        if not top_10_keywords:
-            print("Could not find any keywords to analyze.")
-            return
-        
-        print(f"\n>> Top 10 keywords for analysis: {', '.join(top_10_keywords)}")
-              
-        keyword_sentiments = {}
-        for keyword in top_10_keywords:
-            mask = (df['title'].str.contains(keyword, case=False, na=False) | 
-                   df['description'].str.contains(keyword, case=False, na=False))
-            avg_score = df[mask]['sentiment_score'].mean()
-            if pd.notna(avg_score):
-                keyword_sentiments[keyword] = avg_score
-              
-        if not keyword_sentiments:
-            print("키워드별 감성 분석 데이터를 찾을 수 없습니다.")
-            return
-            
-        sorted_sentiments = sorted(keyword_sentiments.items(), key=lambda item: item[1], reverse=True)
-              
-        keywords = [item[0] for item in sorted_sentiments]
-        scores = [item[1] for item in sorted_sentiments]
-        
-        plt.figure(figsize=(12, 8))
-        bars = plt.bar(keywords, scores, color='skyblue')
-        plt.axhline(0, color='gray', linewidth=0.8, linestyle='--')
-              
-        plt.title('Top 10 Keywords AVG Sentiment Score', fontsize=16)
-        plt.xlabel('Keyword', fontsize=12)
-        plt.ylabel('AVG Sentiment Score (Neg/Pos)', fontsize=12)
-        plt.xticks(rotation=45, ha='right')
-        plt.grid(True, axis='y', linestyle=':', alpha=0.6)
-              
-        for bar in bars:
-            yval = bar.get_height()
-            plt.text(bar.get_x() + bar.get_width()/2.0, yval, f'{yval:.3f}', 
-                    va='bottom' if yval >= 0 else 'top', ha='center')
               
-        plt.tight_layout()
+        plot_keyword_sentiments(sorted_sentiments)
         print("\nDisplaying analysis graph. Close the graph window to continue.")
         plt.show()
               
@@ -328,7 +502,7 @@ def main():
     base_query = input("검색할 기관/주제명을 입력하세요: ")
 
     print("\nTesting different search patterns to check for viability...")
-    test_results = test_search_queries(base_query)
+    test_results = test_search_queries(base_query, DB_FILE)
 
    
     valid_results = {q: c for q, c in test_results.items() if c > 0}
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+
+EXPORT_DIR = "exports"
+EXPORT_FORMATS = ('ndjson', 'parquet')
+EXPORT_BATCH_SIZE = 5000
+
+
+def init_change_log(cursor):
+    """
+    변경 로그(article_changes)와 내보내기 커서(export_cursors) 테이블, 그리고
+    articles INSERT 시 같은 트랜잭션에서 변경 로그를 채우는 트리거를 생성합니다.
+    트리거는 DB에 저장되므로 수집기 외의 경로(노트북, 수동 INSERT)로 추가된 기사도 기록됩니다.
+    트리거가 생기기 전에 저장되어 변경 로그에 없는 기사는 id 순서대로 채워 넣습니다.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS article_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        article_id INTEGER NOT NULL,
+        operation TEXT NOT NULL,
+        changed_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS export_cursors (
+        consumer TEXT PRIMARY KEY,
+        last_seq INTEGER NOT NULL,
+        exported_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS articles_change_log
+        AFTER INSERT ON articles
+        BEGIN
+            INSERT INTO article_changes (article_id, operation, changed_at)
+            VALUES (NEW.id, 'insert', datetime('now', 'localtime'));
+        END
+    ''')
+    cursor.execute(
+        "INSERT INTO article_changes (article_id, operation, changed_at) "
+        "SELECT id, 'insert', search_timestamp FROM articles "
+        "WHERE id NOT IN (SELECT article_id FROM article_changes) ORDER BY id"
+    )
+
+
+def get_data_version(conn):
+    """
+    DB의 데이터 버전: 변경 로그의 마지막 seq (새 기사가 저장될 때만 증가).
+    차트 캐시와 API 응답 캐시가 모두 이 값으로 무효화됩니다.
+    """
+    try:
+        return conn.execute("SELECT MAX(seq) FROM article_changes").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        # 변경 로그가 생기기 전의 DB는 마지막 기사 id 로 대신
+        return conn.execute("SELECT MAX(id) FROM articles").fetchone()[0] or 0
+
+
+def get_cursor(conn, consumer):
+    row = conn.execute("SELECT last_seq FROM export_cursors WHERE consumer = ?", (consumer,)).fetchone()
+    return row[0] if row else 0
+
+
+def _iter_changes(conn, last_seq, batch_size):
+    """last_seq 이후의 변경분만 seq 순서대로 batch 단위로 yield (columns, rows)"""
+    cursor = conn.execute('''
+        SELECT c.seq, c.operation, c.changed_at, a.*
+        FROM article_changes c
+        JOIN articles a ON a.id = c.article_id
+        WHERE c.seq > ?
+        ORDER BY c.seq
+    ''', (last_seq,))
+    columns = [d[0] for d in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield columns, rows
+
+
+def _write_ndjson(batches, path):
+    count, last_seq = 0, None
+    with open(path, 'w', encoding='utf-8') as f:
+        for columns, rows in batches:
+            for row in rows:
+                f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n')
+            count += len(rows)
+            last_seq = rows[-1][0]
+    return count, last_seq
+
+
+def _arrow_type(pa, declared_type):
+    """SQLite 선언 타입을 타입 친화도(affinity) 규칙에 따라 Arrow 타입으로 변환"""
+    declared_type = (declared_type or '').upper()
+    if 'INT' in declared_type:
+        return pa.int64()
+    if any(name in declared_type for name in ('REAL', 'FLOA', 'DOUB')):
+        return pa.float64()
+    if 'BLOB' in declared_type:
+        return pa.binary()
+    return pa.string()
+
+
+def _parquet_schema(pa, conn):
+    """
+    변경 로그 컬럼 + articles 컬럼의 Arrow 스키마를 PRAGMA table_info 의 선언 타입으로 한 번만 생성.
+    첫 batch 의 값으로 추론하면 전부 NULL 인 컬럼이 null 타입이 되어 다음 batch 에서 실패합니다.
+    """
+    fields = [('seq', pa.int64()), ('operation', pa.string()), ('changed_at', pa.string())]
+    for _, name, declared_type, *_ in conn.execute("PRAGMA table_info(articles)"):
+        fields.append((name, _arrow_type(pa, declared_type)))
+    return pa.schema(fields)
+
+
+def _write_parquet(batches, path, conn):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet 내보내기에는 pyarrow 패키지가 필요합니다 (pip install pyarrow).")
+
+    schema = _parquet_schema(pa, conn)
+    count, last_seq, writer = 0, None, None
+    try:
+        for columns, rows in batches:
+            table = pa.Table.from_pydict(
+                {name: [row[i] for row in rows] for i, name in enumerate(columns)}, schema=schema
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(table)
+            count += len(rows)
+            last_seq = rows[-1][0]
+    finally:
+        if writer is not None:
+            writer.close()
+    return count, last_seq
+
+
+def export_changes(db_path, out_dir=EXPORT_DIR, fmt='ndjson', consumer='default', batch_size=EXPORT_BATCH_SIZE):
+    """
+    consumer 의 저장된 커서 이후에 추가된 기사만 NDJSON/Parquet 파일로 내보냅니다.
+    파일 쓰기가 끝난 뒤에 커서를 갱신하므로, 실패하면 다음 실행에서 같은 구간을 다시 내보냅니다.
+    반환값: (내보낸 기사 수, 파일 경로 또는 None)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        with conn:
+            init_change_log(conn.cursor())
+        last_seq = get_cursor(conn, consumer)
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(out_dir, f"{consumer}_{timestamp}_from_{last_seq + 1}.{fmt}")
+        tmp_path = path + '.tmp'
+        batches = _iter_changes(conn, last_seq, batch_size)
+        try:
+            if fmt == 'ndjson':
+                count, new_seq = _write_ndjson(batches, tmp_path)
+            else:
+                count, new_seq = _write_parquet(batches, tmp_path, conn)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if count == 0:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"[{consumer}] 새로 내보낼 기사가 없습니다 (cursor={last_seq}).")
+            return 0, None
+
+        os.replace(tmp_path, path)
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO export_cursors (consumer, last_seq, exported_at) VALUES (?, ?, ?)",
+                (consumer, new_seq, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+
+    print(f"[{consumer}] {count}개 기사를 '{path}'로 내보냈습니다 (cursor {last_seq} -> {new_seq}).")
+    return count, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental export of new articles from the change log")
+    parser.add_argument('--db', required=True, help="예: google_news_monitoring.db")
+    parser.add_argument('--out-dir', default=EXPORT_DIR)
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+    parser.add_argument('--consumer', default='default', help="소비자별로 별도의 커서를 유지")
+    parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    export_changes(args.db, args.out_dir, args.format, args.consumer, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
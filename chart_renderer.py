@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import matplotlib
+matplotlib.use('Agg')  # 창 없이 파일로만 렌더링
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import matplotlib.pyplot as plt
+from contextlib import closing
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from UNHCR import load_daily_stats, plot_trends, DB_FILE as NAVER_DB_FILE
+from UNHCR_Google import compute_keyword_sentiments, plot_keyword_sentiments, DB_FILE as GOOGLE_DB_FILE
+from change_feed import get_data_version
+
+
+CHART_DIR = "charts"
+CHART_FORMATS = ('png', 'svg')
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+def _read_data_version(db_path):
+    """
+    읽기 전용으로 DB를 열어 데이터 버전을 반환합니다.
+    DB 파일이나 articles 테이블이 없으면 None (빈 DB 파일을 새로 만들지 않음).
+    """
+    try:
+        with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as conn:
+            has_articles = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles'"
+            ).fetchone()
+            if has_articles is None:
+                print(f"'{db_path}'에 articles 테이블이 없습니다.")
+                return None
+            return get_data_version(conn)
+    except sqlite3.OperationalError as e:
+        print(f"'{db_path}'을(를) 열 수 없습니다: {e}")
+        return None
+
+
+def _chart_path(kind, db_path, params, fmt, out_dir, version):
+    """(차트 종류, DB, 쿼리 파라미터) 키와 데이터 버전으로 캐시 파일 경로를 만듭니다."""
+    key = json.dumps([kind, os.path.abspath(db_path), params], ensure_ascii=False, sort_keys=True)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    prefix = os.path.join(out_dir, f"{kind}_{digest}")
+    return prefix, f"{prefix}_{version}.{fmt}"
+
+
+def _render_cached(kind, db_path, params, fmt, out_dir, build_figure):
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {fmt}")
+    version = _read_data_version(db_path)
+    if version is None:
+        return None
+    os.makedirs(out_dir, exist_ok=True)
+
+    prefix, path = _chart_path(kind, db_path, params, fmt, out_dir, version)
+    if os.path.exists(path):
+        return path
+
+    fig = build_figure()
+    if fig is None:
+        return None
+    try:
+        fig.savefig(path, format=fmt, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+
+    # 같은 차트의 이전 버전 이미지는 삭제
+    for old_path in glob.glob(f"{glob.escape(prefix)}_*.{fmt}"):
+        if old_path != path:
+            os.remove(old_path)
+    return path
+
+
+def render_trends(db_path, keyword='', fmt='png', out_dir=CHART_DIR):
+    """키워드 트렌드 차트를 파일로 저장하고 경로를 반환 (데이터가 없으면 None)"""
+    def build_figure():
+        daily_stats = load_daily_stats(db_path, keyword)
+        if daily_stats.empty:
+            return None
+        return plot_trends(daily_stats, keyword)
+
+    return _render_cached('trends', db_path, {'keyword': keyword}, fmt, out_dir, build_figure)
+
+
+def render_keyword_sentiment(db_path, fmt='png', out_dir=CHART_DIR):
+    """상위 10개 키워드 감성 차트를 파일로 저장하고 경로를 반환 (데이터가 없으면 None)"""
+    def build_figure():
+        sorted_sentiments = compute_keyword_sentiments(db_path)
+        if not sorted_sentiments:
+            return None
+        return plot_keyword_sentiments(sorted_sentiments)
+
+    return _render_cached('keywords', db_path, {}, fmt, out_dir, build_figure)
+
+
+def render_dashboard(trends_db, keywords_db, keywords=(), fmt='png', out_dir=CHART_DIR):
+    """보고서용 차트 일괄 생성: 전체 트렌드, 키워드별 트렌드, 키워드 감성"""
+    paths = {'trends': render_trends(trends_db, '', fmt, out_dir)}
+    for keyword in keywords:
+        paths[f"trends:{keyword}"] = render_trends(trends_db, keyword, fmt, out_dir)
+    paths['keywords'] = render_keyword_sentiment(keywords_db, fmt, out_dir)
+    return paths
+
+
+def make_handler(trends_db, keywords_db, out_dir):
+    class ChartRequestHandler(BaseHTTPRequestHandler):
+        """GET /trends?keyword=...&format=svg, GET /keywords?format=png"""
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = parse_qs(parts.query)
+            fmt = params.get('format', ['png'])[0]
+            if fmt not in CHART_FORMATS:
+                self.send_error(400, f"format must be one of {', '.join(CHART_FORMATS)}")
+                return
+
+            try:
+                if parts.path == '/trends':
+                    path = render_trends(trends_db, params.get('keyword', [''])[0], fmt, out_dir)
+                elif parts.path == '/keywords':
+                    path = render_keyword_sentiment(keywords_db, fmt, out_dir)
+                else:
+                    self.send_error(404, "Unknown chart")
+                    return
+            except Exception as e:
+                self.send_error(500, str(e))
+                return
+
+            if path is None:
+                self.send_error(404, "No data for this chart")
+                return
+
+            with open(path, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPES[fmt])
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ChartRequestHandler
+
+
+def serve_charts(trends_db, keywords_db, host='127.0.0.1', port=8050, out_dir=CHART_DIR):
+    # matplotlib(pyplot)은 스레드 안전하지 않으므로 단일 스레드로 처리
+    server = HTTPServer((host, port), make_handler(trends_db, keywords_db, out_dir))
+    print(f"Serving charts on http://{host}:{port} (/trends, /keywords)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("차트 서버를 종료합니다.")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless chart rendering for the monitoring DBs")
+    parser.add_argument('command', choices=['render', 'serve'])
+    parser.add_argument('--trends-db', default=NAVER_DB_FILE)
+    parser.add_argument('--keywords-db', default=GOOGLE_DB_FILE)
+    parser.add_argument('--keyword', action='append', default=[], help="키워드별 트렌드 차트 (여러 번 지정 가능)")
+    parser.add_argument('--format', choices=CHART_FORMATS, default='png')
+    parser.add_argument('--out-dir', default=CHART_DIR)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    args = parser.parse_args()
+
+    if args.command == 'render':
+        paths = render_dashboard(args.trends_db, args.keywords_db, args.keyword, args.format, args.out_dir)
+        for name, path in paths.items():
+            print(f"  - {name}: {path or '데이터 없음'}")
+    else:
+        serve_charts(args.trends_db, args.keywords_db, args.host, args.port, args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import json
+import queue
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from change_feed import get_data_version
+
+
+DEFAULT_SOURCES = {
+    'naver': "news_monitoring.db",
+    'google': "google_news_monitoring.db",
+}
+POOL_SIZE = 4
+POOL_TIMEOUT = 5.0
+CACHE_SIZE = 256
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 1000
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadOnlyPool:
+    """
+    읽기 전용 SQLite 연결 풀.
+    수집기 DB는 WAL 모드(init_db)이므로 읽는 동안에도 수집기의 commit 이 막히지 않습니다.
+    짧은 요청만 풀을 쓰고, 긴 스트리밍 응답은 별도 연결(dedicated_connection)을 사용합니다.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._connections = queue.Queue()
+        try:
+            for _ in range(size):
+                self._connections.put(self._open())
+            with self.connection() as conn:
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(articles)")}
+            if not columns:
+                raise sqlite3.OperationalError("no such table: articles")
+        except sqlite3.Error:
+            self.close()
+            raise
+        self.link_column = 'link' if 'link' in columns else 'original_link'
+        self.has_description = 'description' in columns
+
+    def _open(self):
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._connections.get(timeout=self.timeout)
+        except queue.Empty:
+            raise ApiError(503, "database connections are busy, retry later")
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    @contextmanager
+    def dedicated_connection(self):
+        conn = self._open()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def data_version(self):
+        with self.connection() as conn:
+            return get_data_version(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get().close()
+
+
+class ResponseCache:
+    """(소스, 경로, 파라미터) 단위 응답 캐시. 데이터 버전이 바뀌면 해당 항목은 무효화됩니다."""
+
+    def __init__(self, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, body):
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _param(params, name, default=None):
+    return params.get(name, [default])[0]
+
+
+def _int_param(params, name, default, minimum=0, maximum=None):
+    value = _param(params, name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+    if value < minimum:
+        raise ApiError(400, f"'{name}' must be >= {minimum}")
+    return min(value, maximum) if maximum else value
+
+
+def _filters(pool, params):
+    """start/end/q 파라미터를 WHERE 절로 변환"""
+    conditions, args = [], []
+    start = _param(params, 'start')
+    end = _param(params, 'end')
+    keyword = _param(params, 'q') or _param(params, 'keyword')
+    if start:
+        conditions.append("search_timestamp >= ?")
+        args.append(start)
+    if end:
+        conditions.append("search_timestamp <= ?")
+        args.append(end if len(end) > 10 else f"{end} 23:59:59")
+    if keyword:
+        if pool.has_description:
+            conditions.append("(title LIKE ? OR description LIKE ?)")
+            args.extend([f'%{keyword}%', f'%{keyword}%'])
+        else:
+            conditions.append("title LIKE ?")
+            args.append(f'%{keyword}%')
+    return conditions, args
+
+
+def _where(conditions):
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _article_columns(pool):
+    columns = ["id", "search_timestamp", "final_query", "title", f"{pool.link_column} AS link", "sentiment_score"]
+    if pool.has_description:
+        columns += ["description", "published_date", "publisher"]
+    return columns
+
+
+def daily_stats(pool, params):
+    conditions, args = _filters(pool, params)
+    sql = (
+        "SELECT substr(search_timestamp, 1, 10) AS date, COUNT(*), AVG(sentiment_score) "
+        f"FROM articles{_where(conditions)} GROUP BY date ORDER BY date"
+    )
+    with pool.connection() as conn:
+        rows = conn.execute(sql, args).fetchall()
+    return [{'date': d, 'mention_count': c, 'avg_sentiment': s} for d, c, s in rows]
+
+
+def keyword_sentiment(pool, params):
+    keywords = [k for value in params.get('keyword', []) for k in value.split(',') if k.strip()]
+    if not keywords:
+        raise ApiError(400, "at least one 'keyword' is required (e.g. ?keyword=난민,지원)")
+    base_params = {k: v for k, v in params.items() if k not in ('keyword', 'q')}
+
+    results = []
+    with pool.connection() as conn:
+        for keyword in keywords:
+            conditions, args = _filters(pool, dict(base_params, q=[keyword.strip()]))
+            count, avg = conn.execute(
+                f"SELECT COUNT(*), AVG(sentiment_score) FROM articles{_where(conditions)}", args
+            ).fetchone()
+            results.append({'keyword': keyword.strip(), 'article_count': count, 'avg_sentiment': avg})
+    return sorted(results, key=lambda item: (item['avg_sentiment'] is None, -(item['avg_sentiment'] or 0)))
+
+
+def search_articles(pool, params):
+    """
+    기사 검색 (최신순). page/page_size 또는 before_id(키셋 페이지네이션)를 지원합니다.
+    응답의 next_before_id 를 다음 요청에 넘기면 OFFSET 없이 다음 페이지를 읽습니다.
+    """
+    page_size = _int_param(params, 'page_size', DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+    page = _int_param(params, 'page', 1, minimum=1)
+    before_id = _int_param(params, 'before_id', None, minimum=1)
+
+    conditions, args = _filters(pool, params)
+    offset = 0
+    if before_id is not None:
+        conditions.append("id < ?")
+        args.append(before_id)
+    else:
+        offset = (page - 1) * page_size
+
+    sql = (
+        f"SELECT {', '.join(_article_columns(pool))} FROM articles{_where(conditions)} "
+        "ORDER BY id DESC LIMIT ? OFFSET ?"
+    )
+    with pool.connection() as conn:
+        cursor = conn.execute(sql, args + [page_size + 1, offset])
+        names = [d[0] for d in cursor.description]
+        rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return {
+        'page': page if before_id is None else None,
+        'page_size': page_size,
+        'has_more': has_more,
+        'next_before_id': rows[-1]['id'] if has_more else None,
+        'articles': rows,
+    }
+
+
+def stream_articles(pool, params):
+    """조건에 맞는 모든 기사를 NDJSON 줄 단위로 yield (캐시하지 않음, 풀과 별도의 연결 사용)"""
+    conditions, args = _filters(pool, params)
+    sql = f"SELECT {', '.join(_article_columns(pool))} FROM articles{_where(conditions)} ORDER BY id"
+    with pool.dedicated_connection() as conn:
+        cursor = conn.execute(sql, args)
+        names = [d[0] for d in cursor.description]
+        while True:
+            batch = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not batch:
+                break
+            yield ''.join(json.dumps(dict(zip(names, row)), ensure_ascii=False) + '\n' for row in batch)
+
+
+ENDPOINTS = {
+    '/daily_stats': daily_stats,
+    '/keyword_sentiment': keyword_sentiment,
+    '/articles': search_articles,
+}
+
+
+def make_handler(pools, cache, unavailable=None):
+    class QueryRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _pool(self, params):
+            source = _param(params, 'source')
+            if source is None and len(pools) == 1:
+                source = next(iter(pools))
+            if unavailable and source in unavailable:
+                raise ApiError(404, f"source '{source}' is not available: {unavailable[source]}")
+            if source not in pools:
+                raise ApiError(400, f"'source' must be one of: {', '.join(pools)}")
+            return source, pools[source]
+
+        def _source_counts(self):
+            counts = {}
+            for source, pool in pools.items():
+                with pool.connection() as conn:
+                    counts[source] = conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            return counts
+
+        def _stream(self, pool, params):
+            chunks = stream_articles(pool, params)
+            try:
+                # 첫 batch 까지는 헤더 전송 전이므로 오류가 나면 do_GET 에서 JSON 오류로 응답
+                first = next(chunks, '')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                try:
+                    if first:
+                        self._write_chunk(first)
+                    for chunk in chunks:
+                        self._write_chunk(chunk)
+                    self.wfile.write(b"0\r\n\r\n")
+                except Exception as e:
+                    # 헤더를 보낸 뒤에는 상태 코드를 바꿀 수 없으므로 종료 chunk 없이 연결을 끊음
+                    print(f"Stream aborted: {e}")
+                    self.close_connection = True
+            finally:
+                chunks.close()
+
+        def _write_chunk(self, chunk):
+            data = chunk.encode('utf-8')
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = parse_qs(parts.query)
+            try:
+                if parts.path == '/sources':
+                    versions = tuple(pool.data_version() for pool in pools.values())
+                    key = ('*', parts.path, ())
+                    body = cache.get(key, versions)
+                    if body is None:
+                        body = json.dumps(self._source_counts(), ensure_ascii=False).encode('utf-8')
+                        cache.put(key, versions, body)
+                    self._send_json(200, body)
+                    return
+
+                source, pool = self._pool(params)
+                if parts.path == '/articles.ndjson':
+                    self._stream(pool, params)
+                    return
+
+                handler = ENDPOINTS.get(parts.path)
+                if handler is None:
+                    raise ApiError(404, f"Unknown endpoint: {parts.path}")
+
+                version = pool.data_version()
+                key = (source, parts.path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+                body = cache.get(key, version)
+                if body is None:
+                    body = json.dumps(handler(pool, params), ensure_ascii=False).encode('utf-8')
+                    cache.put(key, version, body)
+                self._send_json(200, body)
+            except ApiError as e:
+                self._send_json(e.status, {'error': str(e)})
+            except sqlite3.Error as e:
+                self._send_json(500, {'error': f"database error: {e}"})
+
+    return QueryRequestHandler
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 keep-alive 연결이나 스트림을 먼저 끊은 경우는 정상 종료로 취급
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def create_server(sources, host='127.0.0.1', port=8060, pool_size=POOL_SIZE):
+    """
+    sources: {소스 이름: DB 경로}
+    DB 파일이나 articles 테이블이 없는 소스는 제외하고, 해당 소스 요청에는 404로 응답합니다.
+    """
+    pools, unavailable = {}, {}
+    for source, db_path in sources.items():
+        try:
+            pools[source] = ReadOnlyPool(db_path, pool_size)
+        except sqlite3.Error as e:
+            print(f"[{source}] '{db_path}'을(를) 열 수 없어 제외합니다: {e}")
+            unavailable[source] = f"cannot open database '{db_path}' ({e})"
+    server = QueryServer((host, port), make_handler(pools, ResponseCache(), unavailable))
+    server.pools = pools
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-only JSON API over the monitoring DBs")
+    parser.add_argument('--db', action='append', default=[], metavar='SOURCE=PATH',
+                        help="예: --db naver=news_monitoring.db (여러 번 지정 가능)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8060)
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE)
+    args = parser.parse_args()
+
+    sources = dict(item.split('=', 1) for item in args.db) if args.db else DEFAULT_SOURCES
+    server = create_server(sources, args.host, args.port, args.pool_size)
+    if not server.pools:
+        print("열 수 있는 DB가 없습니다. 수집기를 먼저 실행하거나 --db 로 경로를 지정하세요.")
+        server.server_close()
+        return
+    print(f"Serving query API on http://{args.host}:{args.port} "
+          "(/sources, /daily_stats, /keyword_sentiment, /articles, /articles.ndjson)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("API 서버를 종료합니다.")
+    finally:
+        server.server_close()
+        for pool in server.pools.values():
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
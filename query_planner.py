@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import sqlite3
+from datetime import datetime
+
+
+MIN_RUNS = 2           # 이 횟수만큼은 무조건 검색해 통계를 쌓음
+MIN_HIT_RATE = 0.25    # 새 URL을 추가한 실행 비율이 이보다 낮으면 건너뜀
+REPROBE_INTERVAL = 5   # 건너뛴 검색어도 이 횟수마다 한 번은 다시 검색해 통계를 갱신
+
+
+def init_planner(db_path):
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS query_variant_stats (
+            base_query TEXT NOT NULL,
+            variant TEXT NOT NULL,
+            runs INTEGER NOT NULL DEFAULT 0,
+            hit_runs INTEGER NOT NULL DEFAULT 0,
+            fetched_urls INTEGER NOT NULL DEFAULT 0,
+            new_urls INTEGER NOT NULL DEFAULT 0,
+            skipped_runs INTEGER NOT NULL DEFAULT 0,
+            last_run TEXT,
+            PRIMARY KEY (base_query, variant)
+            )
+        ''')
+        conn.commit()
+
+
+def _load_stats(db_path, base_query):
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT variant, runs, hit_runs, new_urls, skipped_runs FROM query_variant_stats WHERE base_query = ?",
+            (base_query,)
+        ).fetchall()
+    return {
+        variant: {'runs': runs, 'hit_runs': hit_runs, 'new_urls': new_urls, 'skipped_runs': skipped_runs}
+        for variant, runs, hit_runs, new_urls, skipped_runs in rows
+    }
+
+
+def plan_queries(base_query, variants, db_path, always=()):
+    """
+    과거 실행 통계를 바탕으로 실제로 검색할 검색어 변형을 고릅니다.
+    - always 에 포함된 변형은 항상 맨 앞에서 검색 (입력 순서대로)
+    - 통계가 부족한 변형(MIN_RUNS 미만)은 항상 검색
+    - 새 URL을 추가한 비율(hit_runs / runs)이 MIN_HIT_RATE 이상이면 검색
+    - 나머지는 건너뛰되, REPROBE_INTERVAL 번 연속 건너뛰었다면 다시 검색
+    반환값: (검색할 변형 리스트, 건너뛸 변형 리스트)
+    검색 순서는 always -> 통계가 있는 변형(평균 새 URL 수 내림차순) -> 통계가 부족한 변형(입력 순서)이며,
+    같은 입력이면 항상 같은 순서를 반환합니다.
+    """
+    init_planner(db_path)
+    stats = _load_stats(db_path, base_query)
+
+    always = list(dict.fromkeys(always))
+    known, unexplored, skip = [], [], []
+    for variant in dict.fromkeys(variants):
+        if variant in always:
+            continue
+        entry = stats.get(variant)
+        if entry is None or entry['runs'] < MIN_RUNS:
+            unexplored.append(variant)
+            continue
+        hit_rate = entry['hit_runs'] / entry['runs']
+        if hit_rate >= MIN_HIT_RATE or entry['skipped_runs'] + 1 >= REPROBE_INTERVAL:
+            known.append((entry['new_urls'] / entry['runs'], variant))
+        else:
+            skip.append(variant)
+
+    # 기여도가 높은 변형을 먼저 검색해야 뒤의 변형에는 실제로 새로운 URL만 기여로 집계됨
+    # (안정 정렬이므로 기여도가 같으면 입력 순서 유지)
+    known.sort(key=lambda item: item[0], reverse=True)
+    fetch = always + [variant for _, variant in known] + unexplored
+    return fetch, skip
+
+
+def record_query_run(db_path, base_query, fetched_urls, skipped):
+    """
+    한 번의 실행 결과를 통계에 반영합니다.
+    fetched_urls: {변형: URL 리스트} (검색한 순서대로), skipped: 건너뛴 변형 리스트
+    검색에 실패한 변형은 fetched_urls 에 넣지 않아야 합니다 (실패를 0건 실행으로 집계하지 않도록).
+    각 변형의 기여도는 앞서 검색한 변형들에 없던 URL 수입니다.
+    """
+    init_planner(db_path)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    seen = set()
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        for variant, urls in fetched_urls.items():
+            unique_urls = set(u for u in urls if u)
+            new_count = len(unique_urls - seen)
+            seen |= unique_urls
+            cursor.execute('''
+                INSERT INTO query_variant_stats (base_query, variant, runs, hit_runs, fetched_urls, new_urls, skipped_runs, last_run)
+                VALUES (?, ?, 1, ?, ?, ?, 0, ?)
+                ON CONFLICT (base_query, variant) DO UPDATE SET
+                    runs = runs + 1,
+                    hit_runs = hit_runs + excluded.hit_runs,
+                    fetched_urls = fetched_urls + excluded.fetched_urls,
+                    new_urls = new_urls + excluded.new_urls,
+                    skipped_runs = 0,
+                    last_run = excluded.last_run
+            ''', (base_query, variant, 1 if new_count > 0 else 0, len(unique_urls), new_count, now))
+        for variant in skipped:
+            cursor.execute(
+                "UPDATE query_variant_stats SET skipped_runs = skipped_runs + 1 WHERE base_query = ? AND variant = ?",
+                (base_query, variant)
+            )
+        conn.commit()
+    return len(seen)
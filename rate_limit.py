@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import random
+import threading
+import time
+import urllib.error
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+
+# 서비스별 초기/최소/최대 요청 속도(초당 요청 수)와 목표 응답 시간(초)
+SERVICE_DEFAULTS = {
+    'gnews': dict(rate=0.5, min_rate=0.1, max_rate=1.0, target_latency=3.0),
+    'naver': dict(rate=5.0, min_rate=0.5, max_rate=10.0, target_latency=1.0),
+    'translate': dict(rate=2.0, min_rate=0.2, max_rate=8.0, target_latency=1.5),
+}
+FALLBACK_DEFAULTS = dict(rate=1.0, min_rate=0.1, max_rate=4.0, target_latency=2.0)
+
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 호출을 시도하지 않은 경우"""
+
+
+def get_status_code(error):
+    """requests.HTTPError / urllib.error.HTTPError 의 HTTP 상태 코드 (없으면 None)"""
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is None and isinstance(error, urllib.error.HTTPError):
+        status = error.code
+    return status
+
+
+def is_throttle_error(error):
+    """HTTP 429 (Too Many Requests) 오류인지 판별"""
+    status = get_status_code(error)
+    if status is not None:
+        return status == 429
+    return 'Too Many Requests' in str(error)
+
+
+def is_retryable_error(error):
+    """
+    재시도할 가치가 있는 일시적 오류인지 판별: 429, 5xx, 타임아웃, 연결 오류.
+    400/401/403 같은 요청·인증 오류는 재시도해도 같은 결과이므로 제외합니다.
+    """
+    status = get_status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError, urllib.error.URLError)):
+        return True
+    if requests is not None and isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    return is_throttle_error(error)
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """지수 백오프 + full jitter: 0 ~ min(cap, base * 2^attempt) 사이의 임의 대기 시간"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """
+    관측된 결과에 따라 속도가 바뀌는 토큰 버킷 (AIMD).
+    성공하면 속도를 조금씩 올리고, 429나 느린 응답에는 속도를 크게 낮춥니다.
+    """
+
+    def __init__(self, rate, min_rate, max_rate, target_latency, capacity=None):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.latency = None
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """토큰을 하나 얻을 때까지 대기하고, 대기한 시간을 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self, latency):
+        with self._lock:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+            if self.latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            else:
+                self.rate = min(self.max_rate, self.rate + 0.05 * self.max_rate)
+
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold 번을 넘으면 reset_timeout 동안 호출을 차단합니다."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = 'closed'
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                # 한 번만 시험 호출을 허용
+                self.state = 'half_open'
+                return True
+            return self.state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = 'closed'
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class ServiceLimiter:
+    def __init__(self, name, rate, min_rate, max_rate, target_latency):
+        self.name = name
+        self.bucket = TokenBucket(rate, min_rate, max_rate, target_latency)
+        self.breaker = CircuitBreaker()
+
+    def call(self, func, *args, **kwargs):
+        """속도 제한과 서킷 브레이커를 거쳐 func 를 한 번 호출"""
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"'{self.name}' 서비스 호출이 일시 중단되었습니다 (circuit open).")
+        self.bucket.acquire()
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_throttle_error(e):
+                self.bucket.on_throttle()
+            if is_retryable_error(e):
+                self.breaker.record_failure()
+            else:
+                # 요청/인증 오류는 서비스 장애가 아니므로 서킷 상태에 반영하지 않음
+                self.breaker.record_success()
+            raise
+        self.bucket.on_success(time.monotonic() - started)
+        self.breaker.record_success()
+        return result
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(service):
+    """서비스 이름별로 공유되는 ServiceLimiter"""
+    with _limiters_lock:
+        if service not in _limiters:
+            _limiters[service] = ServiceLimiter(service, **SERVICE_DEFAULTS.get(service, FALLBACK_DEFAULTS))
+        return _limiters[service]
+
+
+def call_with_retry(service, func, *args, max_retries=3, **kwargs):
+    """
+    일시적 오류(429, 5xx, 타임아웃, 연결 오류)만 지수 백오프(jitter)로 재시도합니다.
+    그 외 오류는 바로 전달하고, 서킷이 열리면 CircuitOpenError 를 던집니다.
+    """
+    limiter = get_limiter(service)
+    for attempt in range(max_retries):
+        try:
+            return limiter.call(func, *args, **kwargs)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            if attempt == max_retries - 1 or not is_retryable_error(e):
+                raise
+            wait_time = backoff_delay(attempt, base=2.0 if is_throttle_error(e) else 1.0)
+            print(f"[{service}] 요청 실패 ({e}), {wait_time:.1f}초 후 재시도합니다...")
+            time.sleep(wait_time)
@@ -0,0 +1,127 @@
+import json
+import sqlite3
+
+import pytest
+
+from change_feed import export_changes, get_cursor, get_data_version, init_change_log
+
+
+def _make_db(path, count=3):
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            CREATE TABLE articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            search_timestamp TEXT NOT NULL,
+            title TEXT NOT NULL,
+            link TEXT,
+            publisher TEXT,
+            sentiment_score REAL NOT NULL
+            )
+        ''')
+        for i in range(count):
+            conn.execute(
+                "INSERT INTO articles (search_timestamp, title, link, sentiment_score) VALUES (?, ?, ?, ?)",
+                ('2025-01-0%d 09:00:00' % (i + 1), f'title {i}', f'https://example.com/{i}', 0.1 * i)
+            )
+    return str(path)
+
+
+def _add_article(db_path, title, publisher=None):
+    with sqlite3.connect(db_path) as conn:
+        init_change_log(conn.cursor())
+        conn.execute(
+            "INSERT INTO articles (search_timestamp, title, link, publisher, sentiment_score) VALUES (?, ?, ?, ?, ?)",
+            ('2025-02-01 09:00:00', title, f'https://example.com/{title}', publisher, 0.5)
+        )
+
+
+def _read_ndjson(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_init_change_log_backfills_existing_articles(tmp_path):
+    db_path = _make_db(tmp_path / 'news.db')
+    with sqlite3.connect(db_path) as conn:
+        init_change_log(conn.cursor())
+        init_change_log(conn.cursor())  # 두 번 호출해도 다시 채우지 않음
+        assert conn.execute("SELECT article_id FROM article_changes ORDER BY seq").fetchall() == [(1,), (2,), (3,)]
+        assert get_data_version(conn) == 3
+
+
+def test_data_version_without_change_log_uses_last_article_id(tmp_path):
+    db_path = _make_db(tmp_path / 'news.db', count=2)
+    with sqlite3.connect(db_path) as conn:
+        assert get_data_version(conn) == 2
+
+
+def test_export_is_incremental_per_consumer(tmp_path):
+    db_path = _make_db(tmp_path / 'news.db')
+    out_dir = tmp_path / 'exports'
+
+    count, path = export_changes(db_path, str(out_dir), consumer='a', batch_size=2)
+    assert count == 3
+    assert [row['title'] for row in _read_ndjson(path)] == ['title 0', 'title 1', 'title 2']
+
+    assert export_changes(db_path, str(out_dir), consumer='a') == (0, None)
+
+    _add_article(db_path, 'new')
+    count, path = export_changes(db_path, str(out_dir), consumer='a')
+    rows = _read_ndjson(path)
+    assert count == 1 and rows[0]['title'] == 'new' and rows[0]['operation'] == 'insert'
+
+    # 다른 consumer 는 처음부터 받음
+    assert export_changes(db_path, str(out_dir), consumer='b')[0] == 4
+    with sqlite3.connect(db_path) as conn:
+        assert get_cursor(conn, 'a') == get_cursor(conn, 'b') == 4
+    assert not list(out_dir.glob('*.tmp'))
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        export_changes(_make_db(tmp_path / 'news.db'), str(tmp_path), fmt='csv')
+
+
+def test_parquet_schema_comes_from_declared_types(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    db_path = _make_db(tmp_path / 'news.db')
+    _add_article(db_path, 'with publisher', publisher='UNHCR')
+
+    # 첫 batch 의 publisher 는 모두 NULL, 마지막 batch 에만 값이 있음
+    count, path = export_changes(db_path, str(tmp_path / 'exports'), fmt='parquet', batch_size=2)
+    assert count == 4
+
+    table = pq.read_table(path)
+    assert str(table.schema.field('publisher').type) == 'string'
+    assert str(table.schema.field('id').type) == 'int64'
+    assert str(table.schema.field('sentiment_score').type) == 'double'
+    assert str(table.schema.field('seq').type) == 'int64'
+    assert table.column('publisher').to_pylist() == [None, None, None, 'UNHCR']
+
+
+def test_trigger_logs_inserts_from_any_writer(tmp_path):
+    db_path = _make_db(tmp_path / 'news.db', count=1)
+    export_changes(db_path, str(tmp_path / 'exports'))
+
+    # 노트북이나 수동 수정처럼 변경 로그를 모르는 경로의 INSERT
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO articles (search_timestamp, title, sentiment_score) VALUES ('2025-03-01 09:00:00', 'manual', 0.0)"
+        )
+        assert get_data_version(conn) == 2
+
+    count, path = export_changes(db_path, str(tmp_path / 'exports'))
+    assert count == 1 and _read_ndjson(path)[0]['title'] == 'manual'
+
+
+def test_articles_missing_from_log_are_backfilled(tmp_path):
+    db_path = _make_db(tmp_path / 'news.db', count=2)
+    with sqlite3.connect(db_path) as conn:
+        init_change_log(conn.cursor())
+        # 트리거가 없던 시절에 변경 로그 없이 저장된 기사
+        conn.execute("DROP TRIGGER articles_change_log")
+        conn.execute(
+            "INSERT INTO articles (search_timestamp, title, sentiment_score) VALUES ('2025-03-01 09:00:00', 'legacy', 0.0)"
+        )
+        init_change_log(conn.cursor())
+        assert conn.execute("SELECT article_id FROM article_changes ORDER BY seq").fetchall() == [(1,), (2,), (3,)]
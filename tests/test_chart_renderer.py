@@ -0,0 +1,64 @@
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip('matplotlib')
+pytest.importorskip('pandas')
+chart_renderer = pytest.importorskip('chart_renderer')
+
+from change_feed import init_change_log
+
+
+def _make_db(path, rows):
+    with sqlite3.connect(path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            search_timestamp TEXT NOT NULL,
+            final_query TEXT NOT NULL,
+            title TEXT NOT NULL,
+            original_link TEXT NOT NULL UNIQUE,
+            sentiment_score REAL NOT NULL
+            )
+        ''')
+        init_change_log(cursor)
+        for i, (timestamp, title, score) in enumerate(rows):
+            cursor.execute(
+                "INSERT INTO articles (search_timestamp, final_query, title, original_link, sentiment_score) VALUES (?, 'q', ?, ?, ?)",
+                (timestamp, title, f"https://example.com/{i}", score)
+            )
+
+
+def test_render_trends_is_cached_until_new_articles(tmp_path):
+    db_path = str(tmp_path / "news.db")
+    out_dir = str(tmp_path / "charts")
+    _make_db(db_path, [('2025-01-01 10:00:00', '난민 지원', 0.5), ('2025-01-02 10:00:00', '난민 위기', -0.3)])
+
+    first = chart_renderer.render_trends(db_path, fmt='svg', out_dir=out_dir)
+    assert first and os.path.getsize(first) > 0
+    mtime = os.path.getmtime(first)
+    assert chart_renderer.render_trends(db_path, fmt='svg', out_dir=out_dir) == first
+    assert os.path.getmtime(first) == mtime
+
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO articles (search_timestamp, final_query, title, original_link, sentiment_score) "
+            "VALUES ('2025-01-03 10:00:00', 'q', '난민', 'https://example.com/new', 0.1)"
+        )
+
+    second = chart_renderer.render_trends(db_path, fmt='svg', out_dir=out_dir)
+    assert second != first
+    assert os.path.exists(second) and not os.path.exists(first)
+
+
+def test_render_without_articles_table_returns_none(tmp_path):
+    missing = str(tmp_path / "missing.db")
+    assert chart_renderer.render_trends(missing, out_dir=str(tmp_path / "charts")) is None
+    assert not os.path.exists(missing)
+
+    empty = str(tmp_path / "empty.db")
+    sqlite3.connect(empty).close()
+    assert chart_renderer.render_trends(empty, out_dir=str(tmp_path / "charts")) is None
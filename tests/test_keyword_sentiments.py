@@ -0,0 +1,59 @@
+import sqlite3
+import tracemalloc
+
+import pytest
+
+google = pytest.importorskip('UNHCR_Google')
+
+
+def _make_db(path, rows):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT, description TEXT, sentiment_score REAL)")
+        conn.executemany("INSERT INTO articles (title, description, sentiment_score) VALUES (?, ?, ?)", rows)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def split_keywords(monkeypatch):
+    # 형태소 분석기 대신 공백 분리로 키워드 추출
+    monkeypatch.setattr(google, 'extract_keywords', str.split)
+
+
+def test_keyword_sentiments_are_article_averages(tmp_path):
+    db_path = _make_db(tmp_path / 'small.db', [
+        ('난민 난민 보호', '지원', 1.0),
+        ('난민 지원', None, -1.0),
+        ('보호', '', 0.5),
+    ])
+    result = dict(google.compute_keyword_sentiments(db_path, top_n=3, chunk_size=2))
+    assert result == {'난민': pytest.approx(0.0), '보호': pytest.approx(0.75), '지원': pytest.approx(0.0)}
+
+
+def test_empty_db_returns_empty_list(tmp_path):
+    assert google.compute_keyword_sentiments(_make_db(tmp_path / 'empty.db', [])) == []
+
+
+def _peak_memory(tmp_path, row_count):
+    # 기사마다 고유한 키워드가 3개씩 있어 어휘 수가 기사 수에 비례해 늘어나는 최악의 경우
+    rows = ((f"난민 보호 u{i}a u{i}b", f"지원 u{i}c", (i % 5 - 2) / 2) for i in range(row_count))
+    db_path = _make_db(tmp_path / f'large_{row_count}.db', rows)
+
+    tracemalloc.start()
+    try:
+        result = google.compute_keyword_sentiments(db_path, top_n=3, max_vocabulary=5000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert dict(result) == {'난민': pytest.approx(0.0), '보호': pytest.approx(0.0), '지원': pytest.approx(0.0)}
+    return peak
+
+
+def test_peak_memory_stays_flat_as_archive_grows(tmp_path):
+    small_peak = _peak_memory(tmp_path, 10000)
+    large_peak = _peak_memory(tmp_path, 40000)
+
+    # 기사 수가 4배가 되어도 최대 메모리는 거의 같아야 함 (어휘 제한이 없으면 기사 수에 비례해 증가)
+    budget = 8 * 1024 * 1024
+    assert small_peak < budget and large_peak < budget
+    assert large_peak < small_peak * 1.25, (small_peak, large_peak)
@@ -0,0 +1,188 @@
+import http.client
+import json
+import sqlite3
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+
+import query_api
+from change_feed import init_change_log
+
+
+def _make_db(path, count, with_description=True):
+    with sqlite3.connect(path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        if with_description:
+            cursor.execute('''
+                CREATE TABLE articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, search_timestamp TEXT NOT NULL, final_query TEXT NOT NULL,
+                title TEXT NOT NULL, description TEXT, link TEXT NOT NULL UNIQUE, published_date TEXT,
+                sentiment_score REAL NOT NULL, publisher TEXT)
+            ''')
+        else:
+            cursor.execute('''
+                CREATE TABLE articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, search_timestamp TEXT NOT NULL, final_query TEXT NOT NULL,
+                title TEXT NOT NULL, original_link TEXT NOT NULL UNIQUE, sentiment_score REAL NOT NULL)
+            ''')
+        init_change_log(cursor)
+        link_column = 'link' if with_description else 'original_link'
+        for i in range(count):
+            cursor.execute(
+                f"INSERT INTO articles (search_timestamp, final_query, title, {link_column}, sentiment_score) "
+                "VALUES (?, 'q', ?, ?, ?)",
+                (f"2025-01-{i % 3 + 1:02d} 10:00:00", '난민 지원' if i % 2 else '분쟁 위기',
+                 f"https://example.com/{path[-8:]}/{i}", 0.5 if i % 2 else -0.5)
+            )
+
+
+def _insert(path, title):
+    with sqlite3.connect(path, timeout=1) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO articles (search_timestamp, final_query, title, link, sentiment_score) "
+            "VALUES ('2025-01-09 10:00:00', 'q', ?, ?, 0.0)", (title, f"https://example.com/new/{title}")
+        )
+
+
+@pytest.fixture
+def api(tmp_path):
+    google_db = str(tmp_path / "google.db")
+    naver_db = str(tmp_path / "naver.db")
+    _make_db(google_db, 30)
+    _make_db(naver_db, 5, with_description=False)
+    server = query_api.create_server({'google': google_db, 'naver': naver_db}, port=0, pool_size=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, google_db
+    server.shutdown()
+    server.server_close()
+    for pool in server.pools.values():
+        pool.close()
+
+
+def _get(server, path):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode('utf-8')
+
+
+def test_source_counts_and_daily_stats(api):
+    server, _ = api
+    assert json.loads(_get(server, '/sources')[1]) == {'google': 30, 'naver': 5}
+
+    status, body = _get(server, '/daily_stats?source=google&end=2025-01-02')
+    assert status == 200
+    assert [(row['date'], row['mention_count']) for row in json.loads(body)] == [('2025-01-01', 10), ('2025-01-02', 10)]
+
+
+def test_keyword_sentiment(api):
+    server, _ = api
+    keywords = urllib.parse.quote('난민,분쟁')
+    rows = json.loads(_get(server, f'/keyword_sentiment?source=naver&keyword={keywords}')[1])
+    assert rows == [
+        {'keyword': '난민', 'article_count': 2, 'avg_sentiment': 0.5},
+        {'keyword': '분쟁', 'article_count': 3, 'avg_sentiment': -0.5},
+    ]
+    assert _get(server, '/keyword_sentiment?source=naver')[0] == 400
+
+
+def test_keyset_pagination_covers_all_rows(api):
+    server, _ = api
+    seen, before_id = [], None
+    while True:
+        query = '/articles?source=google&page_size=7' + (f'&before_id={before_id}' if before_id else '')
+        page = json.loads(_get(server, query)[1])
+        seen += [article['id'] for article in page['articles']]
+        if not page['has_more']:
+            break
+        before_id = page['next_before_id']
+    assert seen == list(range(30, 0, -1))
+
+
+def test_invalid_parameters(api):
+    server, _ = api
+    assert _get(server, '/articles?source=unknown')[0] == 400
+    assert _get(server, '/articles?source=google&page=0')[0] == 400
+    assert _get(server, '/articles?source=google&page_size=abc')[0] == 400
+    assert _get(server, '/nope?source=google')[0] == 404
+
+
+def test_cached_response_is_invalidated_by_new_articles(api):
+    server, google_db = api
+    first = json.loads(_get(server, '/articles?source=google&page_size=1')[1])
+    _insert(google_db, 'fresh')
+    second = json.loads(_get(server, '/articles?source=google&page_size=1')[1])
+    assert second['articles'][0]['title'] == 'fresh'
+    assert second['articles'][0]['id'] > first['articles'][0]['id']
+
+
+def test_open_stream_does_not_block_writer_or_other_requests(api, monkeypatch):
+    server, google_db = api
+    monkeypatch.setattr(query_api, 'STREAM_BATCH_SIZE', 5)
+
+    # 스트림 여러 개를 일부만 읽은 채로 열어 둠 (풀 크기보다 많이)
+    connections = []
+    for _ in range(3):
+        conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+        conn.request('GET', '/articles.ndjson?source=google')
+        response = conn.getresponse()
+        assert response.status == 200
+        response.readline()
+        connections.append((conn, response))
+
+    _insert(google_db, 'during-stream')
+    status, body = _get(server, '/sources')
+    assert status == 200 and json.loads(body)['google'] == 31
+
+    conn, response = connections[0]
+    lines = [line for line in response.read().decode('utf-8').splitlines() if line]
+    assert len(lines) == 29  # readline 으로 1줄 읽음, 스트림 시작 시점의 스냅샷 30건
+    for conn, _ in connections:
+        conn.close()
+
+
+def test_pool_timeout_returns_503(tmp_path):
+    db_path = str(tmp_path / "google.db")
+    _make_db(db_path, 1)
+    pool = query_api.ReadOnlyPool(db_path, size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(query_api.ApiError) as error:
+            with pool.connection():
+                pass
+    assert error.value.status == 503
+    pool.close()
+
+
+def test_missing_source_is_skipped_with_404(tmp_path):
+    google_db = str(tmp_path / "google.db")
+    empty_db = str(tmp_path / "empty.db")
+    _make_db(google_db, 3)
+    sqlite3.connect(empty_db).close()
+    server = query_api.create_server(
+        {'google': google_db, 'naver': str(tmp_path / "missing.db"), 'empty': empty_db}, port=0, pool_size=1
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        assert list(server.pools) == ['google']
+        status, body = _get(server, '/daily_stats?source=naver')
+        assert status == 404 and 'not available' in json.loads(body)['error']
+        assert _get(server, '/daily_stats?source=empty')[0] == 404
+        status, body = _get(server, '/sources')
+        assert status == 200 and json.loads(body) == {'google': 3}
+        # 열린 소스가 하나뿐이면 source 없이도 조회 가능
+        assert _get(server, '/daily_stats')[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+        for pool in server.pools.values():
+            pool.close()
+    assert not (tmp_path / "missing.db").exists()
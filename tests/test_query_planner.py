@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+import query_planner
+from query_planner import plan_queries, record_query_run
+
+
+def _stats(db_path, base_query='UNHCR'):
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT variant, runs, hit_runs, new_urls, skipped_runs FROM query_variant_stats WHERE base_query = ?",
+            (base_query,)
+        ).fetchall()
+    return {variant: (runs, hit_runs, new_urls, skipped) for variant, runs, hit_runs, new_urls, skipped in rows}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'planner.db')
+
+
+def test_unexplored_variants_keep_input_order(db_path):
+    fetch, skip = plan_queries('UNHCR', ['c', 'a', 'b', 'a'], db_path)
+    assert fetch == ['c', 'a', 'b'] and skip == []
+
+
+def test_record_credits_only_urls_new_to_earlier_variants(db_path):
+    unique = record_query_run(db_path, 'UNHCR', {
+        'base': ['u1', 'u2', 'u2'],
+        'dup': ['u1', 'u2'],
+        'extra': ['u2', 'u3', ''],
+    }, skipped=[])
+    assert unique == 3
+    stats = _stats(db_path)
+    assert stats['base'] == (1, 1, 2, 0)
+    assert stats['dup'] == (1, 0, 0, 0)
+    assert stats['extra'] == (1, 1, 1, 0)
+
+
+def test_low_yield_variants_are_skipped_and_reprobed(db_path):
+    for _ in range(query_planner.MIN_RUNS):
+        record_query_run(db_path, 'UNHCR', {'base': ['u1'], 'dup': ['u1']}, skipped=[])
+
+    fetch, skip = plan_queries('UNHCR', ['base', 'dup'], db_path)
+    assert fetch == ['base'] and skip == ['dup']
+
+    for _ in range(query_planner.REPROBE_INTERVAL - 1):
+        record_query_run(db_path, 'UNHCR', {'base': ['u1']}, skipped=['dup'])
+    fetch, skip = plan_queries('UNHCR', ['base', 'dup'], db_path)
+    assert 'dup' in fetch and skip == []
+
+
+def test_always_variants_come_first_then_by_yield(db_path):
+    # 'rich' 가 기준 검색어보다 새 URL을 더 많이 가져왔어도 always 변형이 먼저 검색됨
+    for run in range(query_planner.MIN_RUNS):
+        record_query_run(db_path, 'UNHCR', {
+            'rich': [f'r{run}-{i}' for i in range(5)],
+            'mid': [f'm{run}-{i}' for i in range(2)],
+            'base': ['b'],
+        }, skipped=[])
+
+    fetch, skip = plan_queries('UNHCR', ['new', 'mid', 'base', 'rich'], db_path, always=['base'])
+    assert fetch == ['base', 'rich', 'mid', 'new'] and skip == []
+
+    # 통계상 건너뛸 변형이라도 always 에 있으면 검색
+    for _ in range(query_planner.MIN_RUNS):
+        record_query_run(db_path, 'UNHCR', {'rich': ['b'], 'base': ['b']}, skipped=[])
+    fetch, _ = plan_queries('UNHCR', ['base', 'rich'], db_path, always=['base'])
+    assert fetch[0] == 'base'
+
+
+def test_failed_searches_are_not_recorded(db_path, monkeypatch):
+    google = pytest.importorskip('UNHCR_Google')
+
+    def fake_search(query, max_results=50, period='7d', raise_on_failure=False):
+        if query == 'UNHCR':
+            return [{'url': 'https://example.com/a', 'title': 'a'}]
+        raise google.SearchFailedError(query)
+
+    monkeypatch.setattr(google, 'get_google_news', fake_search)
+    results = google.test_search_queries('UNHCR', db_path)
+
+    stats = _stats(db_path)
+    assert list(stats) == ['UNHCR']
+    assert stats['UNHCR'] == (1, 1, 1, 0)
+    assert results == {'UNHCR': 1}
+
+
+def test_plan_order_does_not_depend_on_hash_seed(tmp_path):
+    pytest.importorskip('UNHCR_Google')
+    # 문자열 해시 무작위화의 영향을 확인하려면 서로 다른 PYTHONHASHSEED 의 새 프로세스가 필요
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "import UNHCR_Google as g, query_planner as p;"
+        "queries = g.create_flexible_queries('유엔난민기구 한국');"
+        "print('\\n'.join('PLAN ' + q for q in p.plan_queries('유엔난민기구 한국', queries, sys.argv[2], always=queries[:1])[0]))"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    plans = set()
+    for seed in ('1', '2', '3'):
+        output = subprocess.run(
+            [sys.executable, '-c', script, root, str(tmp_path / f'planner_{seed}.db')],
+            env={**os.environ, 'PYTHONHASHSEED': seed}, capture_output=True, text=True, check=True
+        ).stdout
+        plans.add(tuple(line[5:] for line in output.splitlines() if line.startswith('PLAN ')))
+    assert len(plans) == 1
+    plan = next(iter(plans))
+    assert plan[0] == '유엔난민기구 한국' and len(plan) == len(set(plan)) > 5
+
+
+def _scripted_search(monkeypatch, outcomes):
+    """fetch_google_news_rss 를 (기간, 결과 또는 예외) 순서대로 응답하는 가짜로 교체"""
+    google = pytest.importorskip('UNHCR_Google')
+    import rate_limit
+
+    calls = []
+
+    def fake_fetch(query, max_results=50, period='7d'):
+        calls.append(period)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(google, 'fetch_google_news_rss', fake_fetch)
+    monkeypatch.setattr(google.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(rate_limit, '_limiters', {
+        'gnews': rate_limit.ServiceLimiter('gnews', rate=100.0, min_rate=1.0, max_rate=100.0, target_latency=5.0)
+    })
+    return google, calls
+
+
+def test_transient_error_does_not_cut_period_widening(monkeypatch):
+    google, calls = _scripted_search(monkeypatch, [TimeoutError('timed out'), [], [], []])
+    assert google.get_google_news('UNHCR', raise_on_failure=True) == []
+    assert calls == ['7d', '7d', '30d', None]
+
+
+def test_retries_are_counted_per_period(monkeypatch):
+    article = {'url': 'https://example.com/a', 'title': 'a'}
+    google, calls = _scripted_search(monkeypatch, [[], TimeoutError(), ConnectionResetError(), [article]])
+    assert google.get_google_news('UNHCR', raise_on_failure=True) == [article]
+    assert calls == ['7d', '30d', '30d', '30d']
+
+
+def test_failed_fetch_raises_only_when_requested(monkeypatch):
+    google, calls = _scripted_search(monkeypatch, [[], ValueError('bad feed'), [], ValueError('bad feed')])
+    with pytest.raises(google.SearchFailedError):
+        google.get_google_news('UNHCR', raise_on_failure=True)
+    assert calls == ['7d', '30d']
+    assert google.get_google_news('UNHCR') == []
@@ -0,0 +1,192 @@
+import threading
+import urllib.error
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import rate_limit
+from rate_limit import (
+    CircuitBreaker, CircuitOpenError, ServiceLimiter, TokenBucket,
+    backoff_delay, call_with_retry, is_retryable_error, is_throttle_error,
+)
+
+
+class StatusError(Exception):
+    """requests.HTTPError 처럼 response.status_code 를 가진 오류"""
+
+    def __init__(self, status, message=''):
+        super().__init__(message or f"HTTP {status}")
+        self.response = type('Response', (), {'status_code': status})()
+
+
+def _http_error(code):
+    return urllib.error.HTTPError('https://example.com', code, 'error', {}, None)
+
+
+def test_throttle_detection_uses_status_code_only():
+    assert is_throttle_error(StatusError(429))
+    assert is_throttle_error(_http_error(429))
+    assert is_throttle_error(Exception('429 Client Error: Too Many Requests'))
+    assert not is_throttle_error(StatusError(404, 'https://example.com/article/4291 not found'))
+    assert not is_throttle_error(Exception('article id 1429 missing'))
+
+
+@pytest.mark.parametrize('error, expected', [
+    (StatusError(429), True),
+    (StatusError(503), True),
+    (_http_error(500), True),
+    (TimeoutError('timed out'), True),
+    (ConnectionResetError('reset'), True),
+    (urllib.error.URLError('name resolution failed'), True),
+    (StatusError(401), False),
+    (StatusError(400), False),
+    (ValueError('bad json'), False),
+])
+def test_retryable_errors(error, expected):
+    assert is_retryable_error(error) is expected
+
+
+def test_backoff_delay_is_bounded():
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, base=1.0, cap=5.0) <= min(5.0, 2 ** attempt)
+
+
+def test_bucket_adapts_to_success_throttle_and_latency():
+    bucket = TokenBucket(rate=1.0, min_rate=0.1, max_rate=2.0, target_latency=1.0)
+    bucket.on_success(0.1)
+    assert bucket.rate == pytest.approx(1.1)
+    bucket.on_throttle()
+    assert bucket.rate == pytest.approx(0.55)
+    for _ in range(20):
+        bucket.on_success(5.0)
+    assert bucket.rate == pytest.approx(0.1)
+
+
+def test_bucket_paces_calls(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(rate_limit.time, 'sleep', sleeps.append)
+    bucket = TokenBucket(rate=2.0, min_rate=0.1, max_rate=2.0, target_latency=1.0)
+    # capacity(=2) 만큼은 바로 통과하고, 그 다음 요청은 1/rate 초 대기
+    for _ in range(3):
+        bucket.acquire()
+    assert len(sleeps) == 1 and sleeps[0] == pytest.approx(0.5, abs=0.05)
+
+
+def test_circuit_breaker_opens_and_recovers(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] += 11
+    assert breaker.allow() and breaker.state == 'half_open'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    now[0] += 11
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+def _limiter():
+    return ServiceLimiter('test', rate=100.0, min_rate=1.0, max_rate=100.0, target_latency=1.0)
+
+
+def test_client_errors_do_not_trip_breaker():
+    limiter = _limiter()
+
+    def unauthorized():
+        raise StatusError(401)
+
+    for _ in range(10):
+        with pytest.raises(StatusError):
+            limiter.call(unauthorized)
+    assert limiter.breaker.state == 'closed'
+
+
+def test_server_errors_open_breaker():
+    limiter = _limiter()
+
+    def unavailable():
+        raise StatusError(503)
+
+    for _ in range(limiter.breaker.failure_threshold):
+        with pytest.raises(StatusError):
+            limiter.call(unavailable)
+    with pytest.raises(CircuitOpenError):
+        limiter.call(lambda: 'ok')
+
+
+def test_call_with_retry_only_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(rate_limit, '_limiters', {'svc': _limiter()})
+
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise StatusError(429)
+        return 'ok'
+
+    assert call_with_retry('svc', flaky) == 'ok'
+    assert len(calls) == 3
+
+    calls.clear()
+
+    def bad_credentials():
+        calls.append(1)
+        raise StatusError(401)
+
+    with pytest.raises(StatusError):
+        call_with_retry('svc', bad_credentials)
+    assert len(calls) == 1
+
+
+RSS_BODY = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>t</title>
+<item><title>UNHCR news</title><link>https://news.google.com/rss/articles/a</link>
+<pubDate>Mon, 06 Jan 2025 00:00:00 GMT</pubDate><description>d</description>
+<source url="https://www.yna.co.kr">Yonhap</source></item>
+<item><title>video</title><link>https://news.google.com/rss/articles/b</link>
+<source url="https://www.youtube.com">YouTube</source></item>
+</channel></rss>"""
+
+
+class RssHandler(BaseHTTPRequestHandler):
+    statuses = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = RSS_BODY if status == 200 else b'error'
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def rss_server(monkeypatch):
+    google = pytest.importorskip('UNHCR_Google')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RssHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(google, 'GOOGLE_NEWS_RSS_URL', f"http://127.0.0.1:{server.server_address[1]}/rss/search")
+    monkeypatch.setattr(google.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(rate_limit, '_limiters', {'gnews': _limiter()})
+    yield google
+    server.shutdown()
+    server.server_close()
+
+
+def test_google_news_rss_throttle_reaches_limiter(rss_server):
+    RssHandler.statuses = [429, 200]
+    articles = rss_server.get_google_news('UNHCR')
+    assert [article['title'] for article in articles] == ['UNHCR news']
+    assert articles[0]['publisher']['title'] == 'Yonhap'
+    # 429 로 속도가 절반으로 줄었다가 성공 한 번만큼만 회복
+    assert rate_limit.get_limiter('gnews').bucket.rate == pytest.approx(55.0)
@@ -0,0 +1,89 @@
+import sqlite3
+
+import pytest
+
+import unified_store
+from unified_store import insert_articles, query_articles, count_by_source, list_months, migrate_legacy_db
+
+
+def _row(source, timestamp, link, title='난민 지원', score=0.1):
+    return {
+        'source': source, 'search_timestamp': timestamp, 'final_query': 'q',
+        'title': title, 'link': link, 'sentiment_score': score,
+    }
+
+
+def test_rows_are_sharded_by_month_and_deduplicated(tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    rows = [
+        _row('naver', '2025-01-05 10:00:00', 'https://example.com/a'),
+        _row('naver', '2025-02-05 10:00:00', 'https://example.com/b'),
+        # 같은 기사를 다른 소스/다른 달/다른 URL 형태로 다시 수집
+        _row('google', '2025-03-01 10:00:00', 'http://www.example.com/a?utm_source=rss'),
+    ]
+    assert insert_articles(rows, shard_dir) == 2
+    assert insert_articles(rows, shard_dir) == 0
+    assert {'2025-01', '2025-02'} <= set(list_months(shard_dir))
+    assert count_by_source(shard_dir) == {'naver': 2}
+
+
+def test_query_attaches_only_shards_in_range(tmp_path, monkeypatch):
+    shard_dir = str(tmp_path / "shards")
+    insert_articles([
+        _row('naver', f'2025-{month:02d}-10 09:00:00', f'https://example.com/{month}', title=f'기사 {month}')
+        for month in range(1, 13)
+    ], shard_dir)
+
+    attached = []
+    original_shard_path = unified_store.shard_path
+
+    def recording_shard_path(directory, month):
+        attached.append(month)
+        return original_shard_path(directory, month)
+
+    monkeypatch.setattr(unified_store, 'shard_path', recording_shard_path)
+    rows = list(query_articles(shard_dir, start='2025-03-01', end='2025-04-30'))
+    assert [row['title'] for row in rows] == ['기사 3', '기사 4']
+    assert attached == ['2025-03', '2025-04']
+
+
+def test_query_spanning_more_shards_than_attach_limit(tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    insert_articles([
+        _row('google', f'{year}-{month:02d}-01 00:00:00', f'https://example.com/{year}/{month}')
+        for year in (2024, 2025) for month in range(1, 13)
+    ], shard_dir)
+    timestamps = [row['search_timestamp'] for row in query_articles(shard_dir)]
+    assert len(timestamps) == 24
+    assert timestamps == sorted(timestamps)
+
+
+def test_query_rejects_unknown_columns(tmp_path):
+    with pytest.raises(ValueError):
+        list(query_articles(str(tmp_path), columns=('title; DROP TABLE articles',)))
+
+
+def test_migrate_both_legacy_schemas(tmp_path):
+    naver_db = str(tmp_path / "news_monitoring.db")
+    google_db = str(tmp_path / "google_news_monitoring.db")
+    with sqlite3.connect(naver_db) as conn:
+        conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY, search_timestamp TEXT, final_query TEXT, "
+                     "title TEXT, original_link TEXT UNIQUE, sentiment_score REAL)")
+        conn.execute("INSERT INTO articles VALUES (1, '2025-05-01 00:00:00', 'q', 'n', 'https://example.com/n', 0.2)")
+    with sqlite3.connect(google_db) as conn:
+        conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY, search_timestamp TEXT, final_query TEXT, "
+                     "title TEXT, description TEXT, link TEXT UNIQUE, published_date TEXT, "
+                     "sentiment_score REAL, publisher TEXT)")
+        conn.execute("INSERT INTO articles VALUES (1, '2025-05-02 00:00:00', 'q', 'g', 'd', "
+                     "'https://example.com/g', 'Fri', -0.1, '연합뉴스')")
+
+    shard_dir = str(tmp_path / "shards")
+    assert migrate_legacy_db(naver_db, 'naver', shard_dir) == 1
+    assert migrate_legacy_db(google_db, 'google', shard_dir) == 1
+    assert migrate_legacy_db(naver_db, 'naver', shard_dir) == 0
+
+    rows = list(query_articles(shard_dir, columns=('source', 'link', 'description', 'publisher')))
+    assert rows == [
+        {'source': 'naver', 'link': 'https://example.com/n', 'description': None, 'publisher': None},
+        {'source': 'google', 'link': 'https://example.com/g', 'description': 'd', 'publisher': '연합뉴스'},
+    ]
@@ -0,0 +1,177 @@
+import sqlite3
+import threading
+from datetime import timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import rate_limit
+import url_resolver
+from url_resolver import normalize_url, resolve_canonical_urls, resolve_url, ensure_link_key_column
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """/redirect: 302 -> /article, /no-head: HEAD 405 + GET 본문에 canonical, /google-canonical: 잘못된 canonical"""
+    hits = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def _article_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/article?id=7&utm_source=rss"
+
+    def do_HEAD(self):
+        self.hits.append(('HEAD', self.path))
+        if self.path == '/throttled':
+            self.send_response(429)
+            self.end_headers()
+        elif self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', self._article_url())
+            self.end_headers()
+        elif self.path in ('/no-head', '/google-canonical'):
+            self.send_response(405)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.end_headers()
+
+    def do_GET(self):
+        self.hits.append(('GET', self.path))
+        if self.path == '/no-head':
+            body = f'<html><head><link rel="canonical" href="{self._article_url()}"></head></html>'
+        elif self.path == '/google-canonical':
+            body = (
+                '<link rel="canonical" href="https://news.google.com/rss/articles/abc">'
+                f'<div data-n-au="{self._article_url()}"></div>'
+            )
+        else:
+            body = '<html></html>'
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture(autouse=True)
+def fast_limiter(monkeypatch):
+    limiter = rate_limit.ServiceLimiter('gnews', rate=100.0, min_rate=1.0, max_rate=100.0, target_latency=5.0)
+    monkeypatch.setattr(rate_limit, '_limiters', {url_resolver.RESOLVER_SERVICE: limiter})
+    return limiter
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    # 'localhost' 를 리다이렉트 호스트로 취급하고, 최종 기사는 127.0.0.1 에서 응답
+    monkeypatch.setattr(url_resolver, 'REDIRECT_HOSTS', {'localhost'})
+    StubHandler.hits = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://localhost:{server.server_address[1]}", f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_head_redirect_is_followed(stub_server):
+    redirect_base, article_base = stub_server
+    assert resolve_url(f"{redirect_base}/redirect") == f"{article_base}/article?id=7&utm_source=rss"
+    assert ('GET', '/redirect') not in StubHandler.hits
+
+
+def test_head_405_falls_back_to_get_canonical(stub_server):
+    redirect_base, article_base = stub_server
+    assert resolve_url(f"{redirect_base}/no-head") == f"{article_base}/article?id=7&utm_source=rss"
+    assert ('GET', '/no-head') in StubHandler.hits
+
+
+def test_canonical_pointing_to_redirect_host_is_skipped(stub_server, monkeypatch):
+    redirect_base, article_base = stub_server
+    monkeypatch.setattr(url_resolver, 'REDIRECT_HOSTS', {'localhost', 'news.google.com'})
+    assert resolve_url(f"{redirect_base}/google-canonical") == f"{article_base}/article?id=7&utm_source=rss"
+
+
+def test_resolved_urls_are_cached(stub_server, tmp_path):
+    redirect_base, article_base = stub_server
+    db_path = str(tmp_path / "cache.db")
+    url = f"{redirect_base}/redirect"
+
+    first = resolve_canonical_urls([url, url, 'https://example.com/a'], db_path)
+    assert first[url] == f"{article_base}/article?id=7&utm_source=rss"
+    assert first['https://example.com/a'] == 'https://example.com/a'
+
+    StubHandler.hits = []
+    second = resolve_canonical_urls([url], db_path)
+    assert second == {url: first[url]}
+    assert StubHandler.hits == []
+
+
+def test_failed_resolution_is_cached_until_retry_time(stub_server, tmp_path, monkeypatch):
+    redirect_base, _ = stub_server
+    db_path = str(tmp_path / "cache.db")
+    url = f"{redirect_base}/missing"  # 200 이지만 canonical 없음
+
+    assert resolve_canonical_urls([url], db_path) == {url: url}
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT canonical_url FROM url_redirects").fetchall() == [('',)]
+
+    StubHandler.hits = []
+    assert resolve_canonical_urls([url], db_path) == {url: url}
+    assert StubHandler.hits == []
+
+    # 재시도 시간이 지나면 다시 해석
+    monkeypatch.setattr(url_resolver, 'FAILED_RETRY_AFTER', timedelta(seconds=-1))
+    assert resolve_canonical_urls([url], db_path) == {url: url}
+    assert ('HEAD', '/missing') in StubHandler.hits
+
+
+def test_throttled_lookup_reaches_limiter_and_is_not_cached(stub_server, tmp_path, fast_limiter):
+    redirect_base, _ = stub_server
+    db_path = str(tmp_path / "cache.db")
+    url = f"{redirect_base}/throttled"
+
+    assert resolve_canonical_urls([url], db_path) == {url: url}
+    assert fast_limiter.bucket.rate == pytest.approx(50.0)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM url_redirects").fetchone()[0] == 0
+
+
+def test_open_circuit_defers_lookups(stub_server, tmp_path, fast_limiter):
+    redirect_base, _ = stub_server
+    db_path = str(tmp_path / "cache.db")
+    url = f"{redirect_base}/redirect"
+    for _ in range(fast_limiter.breaker.failure_threshold):
+        fast_limiter.breaker.record_failure()
+
+    assert resolve_canonical_urls([url], db_path) == {url: url}
+    assert StubHandler.hits == []
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM url_redirects").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://m.example.com/a/?utm_medium=x&b=1#top', 'https://example.com/a?b=1'),
+    ('http://www.example.com/news?fbclid=1&id=3', 'https://example.com/news?id=3'),
+    ('https://Example.com:443/A?z=1&a=2', 'https://example.com/A?a=2&z=1'),
+    ('https://mobile.news.example.co.kr/view', 'https://news.example.co.kr/view'),
+    ('http://127.0.0.1:8080/x/', 'https://127.0.0.1:8080/x'),
+    ('https://m.com/a', 'https://m.com/a'),
+    ('', ''),
+    ('not a url', 'not a url'),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_ensure_link_key_column_backfills_legacy_rows(tmp_path):
+    with sqlite3.connect(str(tmp_path / "legacy.db")) as conn:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY, original_link TEXT NOT NULL UNIQUE)")
+        cursor.execute("INSERT INTO articles (original_link) VALUES ('http://www.example.com/a?utm_source=x')")
+        ensure_link_key_column(cursor, 'original_link')
+        ensure_link_key_column(cursor, 'original_link')
+        assert cursor.execute("SELECT original_link, link_key FROM articles").fetchall() == [
+            ('http://www.example.com/a?utm_source=x', 'https://example.com/a')
+        ]
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import argparse
+import os
+import re
+import sqlite3
+from collections import defaultdict
+from contextlib import closing
+
+from url_resolver import normalize_url
+
+
+SHARD_DIR = "monitoring_shards"
+INDEX_DB = "index.db"
+SHARD_PATTERN = re.compile(r'^articles_(\d{4})_(\d{2})\.db$')
+MAX_ATTACHED = 10  # SQLite 기본 ATTACH 한도
+
+COLUMNS = [
+    'source', 'search_timestamp', 'final_query', 'title', 'description',
+    'link', 'published_date', 'sentiment_score', 'publisher',
+]
+
+# 레거시 DB 컬럼 -> 통합 스키마 컬럼
+LEGACY_COLUMN_MAP = {'original_link': 'link'}
+
+
+def shard_path(shard_dir, month):
+    """'YYYY-MM' 월에 해당하는 샤드 파일 경로"""
+    year, mon = month.split('-')
+    return os.path.join(shard_dir, f"articles_{year}_{mon}.db")
+
+
+def list_months(shard_dir):
+    """존재하는 샤드의 월 목록 (오름차순)"""
+    if not os.path.isdir(shard_dir):
+        return []
+    months = []
+    for name in os.listdir(shard_dir):
+        match = SHARD_PATTERN.match(name)
+        if match:
+            months.append(f"{match.group(1)}-{match.group(2)}")
+    return sorted(months)
+
+
+def init_index(shard_dir):
+    """샤드·소스 간 중복 방지를 위한 링크 인덱스 DB 초기화 (정규화된 link_key 기준)"""
+    os.makedirs(shard_dir, exist_ok=True)
+    with closing(sqlite3.connect(os.path.join(shard_dir, INDEX_DB))) as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS links (
+            link_key TEXT PRIMARY KEY,
+            source TEXT NOT NULL,
+            month TEXT NOT NULL
+            )
+        ''')
+        conn.commit()
+
+
+def init_shard(conn, schema='main'):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.articles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source TEXT NOT NULL,
+        search_timestamp TEXT NOT NULL,
+        final_query TEXT NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        link TEXT NOT NULL UNIQUE,
+        published_date TEXT,
+        sentiment_score REAL NOT NULL,
+        publisher TEXT
+        )
+    ''')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {schema}.idx_articles_source_ts
+        ON articles (source, search_timestamp)
+    ''')
+
+
+def insert_articles(rows, shard_dir=SHARD_DIR):
+    """
+    통합 스키마의 기사(dict) 리스트를 월별 샤드에 저장합니다.
+    search_timestamp의 월로 샤드를 고르고, 정규화한 링크가 이미 저장된 기사는
+    (다른 소스에서 수집된 경우도 포함) 건너뜁니다.
+    반환값: 새로 저장된 기사 수
+    """
+    init_index(shard_dir)
+    by_month = defaultdict(list)
+    for row in rows:
+        if not row.get('link') or not row.get('search_timestamp'):
+            continue
+        by_month[row['search_timestamp'][:7]].append(row)
+
+    inserted = 0
+    placeholders = ', '.join('?' for _ in COLUMNS)
+    for month, month_rows in sorted(by_month.items()):
+        with closing(sqlite3.connect(shard_path(shard_dir, month))) as conn:
+            # 샤드와 인덱스를 하나의 트랜잭션으로 갱신
+            conn.execute("ATTACH DATABASE ? AS idx", (os.path.join(shard_dir, INDEX_DB),))
+            init_shard(conn)
+            with conn:
+                for row in month_rows:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO idx.links (link_key, source, month) VALUES (?, ?, ?)",
+                        (normalize_url(row['link']), row['source'], month)
+                    )
+                    if cursor.rowcount == 0:
+                        continue
+                    conn.execute(
+                        f"INSERT INTO articles ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                        [row.get(column) for column in COLUMNS]
+                    )
+                    inserted += 1
+    return inserted
+
+
+def _months_in_range(shard_dir, start=None, end=None):
+    start_month = start[:7] if start else None
+    end_month = end[:7] if end else None
+    return [
+        month for month in list_months(shard_dir)
+        if (start_month is None or month >= start_month) and (end_month is None or month <= end_month)
+    ]
+
+
+def query_articles(shard_dir=SHARD_DIR, start=None, end=None, source=None, keyword=None,
+                   columns=('source', 'search_timestamp', 'title', 'link', 'sentiment_score')):
+    """
+    기간(start/end: 'YYYY-MM-DD' 또는 'YYYY-MM-DD HH:MM:SS')에 해당하는 샤드만 ATTACH 하여 조회합니다.
+    search_timestamp 오름차순으로 dict를 하나씩 yield 합니다.
+    """
+    for column in columns:
+        if column not in COLUMNS and column != 'id':
+            raise ValueError(f"Unknown column: {column}")
+
+    conditions, params = [], []
+    if start:
+        conditions.append("search_timestamp >= ?")
+        params.append(start)
+    if end:
+        # 날짜만 주어지면 해당 일의 끝까지 포함
+        conditions.append("search_timestamp <= ?")
+        params.append(end if len(end) > 10 else f"{end} 23:59:59")
+    if source:
+        conditions.append("source = ?")
+        params.append(source)
+    if keyword:
+        conditions.append("title LIKE ?")
+        params.append(f'%{keyword}%')
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    select = ', '.join(columns)
+
+    months = _months_in_range(shard_dir, start, end)
+    # 조회는 읽기 전용으로 ATTACH (URI 파일명 사용)
+    with closing(sqlite3.connect('file::memory:', uri=True)) as conn:
+        for i in range(0, len(months), MAX_ATTACHED):
+            batch = months[i:i + MAX_ATTACHED]
+            aliases = []
+            for j, month in enumerate(batch):
+                alias = f"shard{j}"
+                conn.execute(f"ATTACH DATABASE ? AS {alias}", (f"file:{shard_path(shard_dir, month)}?mode=ro",))
+                aliases.append(alias)
+
+            sql = " UNION ALL ".join(f"SELECT {select} FROM {alias}.articles{where}" for alias in aliases)
+            sql += " ORDER BY search_timestamp"
+            for row in conn.execute(sql, params * len(aliases)):
+                yield dict(zip(columns, row))
+
+            for alias in aliases:
+                conn.execute(f"DETACH DATABASE {alias}")
+
+
+def count_by_source(shard_dir=SHARD_DIR, start=None, end=None):
+    counts = defaultdict(int)
+    for row in query_articles(shard_dir, start, end, columns=('source', 'search_timestamp')):
+        counts[row['source']] += 1
+    return dict(counts)
+
+
+def migrate_legacy_db(db_path, source, shard_dir=SHARD_DIR, batch_size=1000):
+    """
+    기존 news_monitoring.db / google_news_monitoring.db 의 articles 를 통합 샤드로 옮깁니다.
+    없는 컬럼(description, publisher 등)은 NULL로 채웁니다.
+    """
+    with closing(sqlite3.connect(db_path)) as conn:
+        legacy_columns = [row[1] for row in conn.execute("PRAGMA table_info(articles)")]
+        if not legacy_columns:
+            print(f"'{db_path}'에 articles 테이블이 없습니다.")
+            return 0
+
+        cursor = conn.execute(f"SELECT {', '.join(legacy_columns)} FROM articles ORDER BY id")
+        mapped = [LEGACY_COLUMN_MAP.get(column, column) for column in legacy_columns]
+        migrated = 0
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            rows = []
+            for values in batch:
+                row = dict(zip(mapped, values))
+                row['source'] = source
+                rows.append(row)
+            migrated += insert_articles(rows, shard_dir)
+
+    print(f">> '{db_path}' ({source}): {migrated}개 기사를 '{shard_dir}'로 이전했습니다.")
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monthly-sharded unified article store")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate = subparsers.add_parser('migrate', help="기존 DB를 통합 샤드로 이전 (다시 실행해도 중복 저장되지 않음)")
+    migrate.add_argument('--naver', help="UNHCR.py DB (예: news_monitoring.db)")
+    migrate.add_argument('--google', help="UNHCR_Google.py DB (예: google_news_monitoring.db)")
+
+    stats = subparsers.add_parser('stats', help="샤드별/소스별 기사 수 출력")
+    stats.add_argument('--start')
+    stats.add_argument('--end')
+
+    for sub in (migrate, stats):
+        sub.add_argument('--shard-dir', default=SHARD_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        if args.naver:
+            migrate_legacy_db(args.naver, 'naver', args.shard_dir)
+        if args.google:
+            migrate_legacy_db(args.google, 'google', args.shard_dir)
+    else:
+        months = _months_in_range(args.shard_dir, args.start, args.end)
+        print(f"Shards: {', '.join(months) if months else '(none)'}")
+        for source, count in sorted(count_by_source(args.shard_dir, args.start, args.end).items()):
+            print(f"  - {source}: {count}")
+
+
+if __name__ == "__main__":
+    main()
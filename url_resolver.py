@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import re
+import sqlite3
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from rate_limit import get_limiter, CircuitOpenError
+
+
+REDIRECT_HOSTS = {'news.google.com'}
+# 리다이렉트 호스트가 Google News 이므로 검색 요청과 같은 속도 제한/서킷 브레이커를 공유
+RESOLVER_SERVICE = 'gnews'
+
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid',
+    'ocid', 'cmpid', 'ref', 'ref_src', 'spm', 'from', 'output', '_ga',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+MOBILE_HOST_PREFIXES = ('m.', 'mobile.', 'www.')
+
+USER_AGENT = 'Mozilla/5.0 (compatible; UNHCR-Monitoring/1.0)'
+
+# 해석에 실패한 URL은 canonical_url='' 로 캐시하고, 이 시간이 지난 뒤에 다시 시도
+FAILED_RETRY_AFTER = timedelta(hours=6)
+
+CANONICAL_PATTERNS = [
+    re.compile(r'<link[^>]+rel=["\']canonical["\'][^>]*href=["\']([^"\']+)["\']', re.I),
+    re.compile(r'<link[^>]+href=["\']([^"\']+)["\'][^>]*rel=["\']canonical["\']', re.I),
+    re.compile(r'data-n-au=["\']([^"\']+)["\']', re.I),
+]
+
+
+def normalize_url(url):
+    """
+    중복 판별용 URL 키: 추적 파라미터, 모바일/www 호스트, fragment 제거, http -> https.
+    저장·표시용 링크는 원본을 그대로 쓰고, 이 값은 link_key 로만 사용합니다.
+    """
+    if not url:
+        return ''
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme == 'http':
+        scheme = 'https'
+
+    host = (parts.hostname or '').lower()
+    for prefix in MOBILE_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def init_redirect_cache(db_path):
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS url_redirects (
+            url TEXT PRIMARY KEY,
+            canonical_url TEXT NOT NULL,
+            resolved_at TEXT NOT NULL
+            )
+        ''')
+        conn.commit()
+
+
+def ensure_link_key_column(cursor, link_column):
+    """
+    articles 테이블에 중복 판별용 link_key 컬럼과 인덱스를 추가하고,
+    비어 있는 기존 행은 link_column 값을 정규화해 한 번 채웁니다.
+    """
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(articles)")}
+    if 'link_key' not in columns:
+        cursor.execute("ALTER TABLE articles ADD COLUMN link_key TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_link_key ON articles (link_key)")
+    rows = cursor.execute(f"SELECT id, {link_column} FROM articles WHERE link_key IS NULL").fetchall()
+    cursor.executemany(
+        "UPDATE articles SET link_key = ? WHERE id = ?",
+        [(normalize_url(link), article_id) for article_id, link in rows]
+    )
+
+
+def _extract_canonical(html):
+    for pattern in CANONICAL_PATTERNS:
+        for match in pattern.finditer(html):
+            candidate = match.group(1)
+            # canonical 이 다시 리다이렉트 호스트를 가리키면 실제 기사 URL이 아님
+            if candidate.startswith('http') and urlsplit(candidate).hostname not in REDIRECT_HOSTS:
+                return candidate
+    return None
+
+
+def _fetch(url, timeout, method):
+    """(최종 URL, 본문 앞부분) 반환. HEAD 요청은 본문을 읽지 않음"""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT}, method=method)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = response.read(65536) if method == 'GET' else b''
+        return response.geturl(), body
+
+
+def resolve_url(url, timeout=10, limiter=None):
+    """
+    리다이렉트를 따라가 최종 기사 URL을 반환 (실패 시 None).
+    모든 요청은 RESOLVER_SERVICE 의 limiter 를 거치므로 429 는 속도 제한에 반영되고,
+    429 와 서킷 차단(CircuitOpenError)은 호출자가 캐시하지 않도록 예외로 전달합니다.
+    """
+    limiter = limiter or get_limiter(RESOLVER_SERVICE)
+    final_url = None
+    try:
+        final_url, _ = limiter.call(_fetch, url, timeout, 'HEAD')
+    except urllib.error.HTTPError as e:
+        if e.code == 429:
+            raise
+        if e.code not in (403, 405, 501):
+            return None
+    except CircuitOpenError:
+        raise
+    except Exception:
+        return None
+
+    if final_url and urlsplit(final_url).hostname not in REDIRECT_HOSTS:
+        return final_url
+
+    # HEAD가 막혀 있거나 여전히 리다이렉트 호스트라면 GET으로 본문의 canonical 링크를 확인
+    try:
+        final_url, body = limiter.call(_fetch, url, timeout, 'GET')
+    except urllib.error.HTTPError as e:
+        if e.code == 429:
+            raise
+        return None
+    except CircuitOpenError:
+        raise
+    except Exception:
+        return None
+    if urlsplit(final_url).hostname not in REDIRECT_HOSTS:
+        return final_url
+
+    return _extract_canonical(body.decode('utf-8', errors='ignore'))
+
+
+def resolve_canonical_urls(urls, db_path, max_workers=8, timeout=10):
+    """
+    리다이렉트 URL 리스트를 실제 기사 URL로 변환합니다.
+    1. DB의 url_redirects 캐시 조회 (실패 기록은 FAILED_RETRY_AFTER 가 지나기 전까지 재시도하지 않음)
+    2. 캐시에 없는 리다이렉트 URL만 병렬로 해석
+    3. 해석 결과를 캐시에 저장 (실패는 canonical_url='' 로 저장)
+    반환값: {원본 URL: 기사 URL} (리다이렉트가 아니거나 해석에 실패하면 원본 그대로)
+    """
+    init_redirect_cache(db_path)
+    unique_urls = list(dict.fromkeys(u for u in urls if u))
+    resolved = {}
+    retry_cutoff = (datetime.now() - FAILED_RETRY_AFTER).strftime('%Y-%m-%d %H:%M:%S')
+
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        pending = []
+        cached_count = 0
+        for url in unique_urls:
+            if urlsplit(url).hostname not in REDIRECT_HOSTS:
+                resolved[url] = url
+                continue
+            cursor.execute("SELECT canonical_url, resolved_at FROM url_redirects WHERE url = ?", (url,))
+            row = cursor.fetchone()
+            if row is not None and (row[0] or row[1] > retry_cutoff):
+                resolved[url] = row[0] or url
+                cached_count += 1
+            else:
+                pending.append(url)
+
+        if pending:
+            print(f"Resolving {len(pending)} redirect URLs ({cached_count} cached)...")
+            limiter = get_limiter(RESOLVER_SERVICE)
+
+            def attempt(url):
+                try:
+                    return resolve_url(url, timeout, limiter), True
+                except (urllib.error.HTTPError, CircuitOpenError):
+                    # 429 / 서킷 차단은 URL 문제가 아니므로 실패로 캐시하지 않고 다음 실행에서 재시도
+                    return None, False
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(attempt, pending))
+
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            failed_count = deferred_count = 0
+            for url, (target, attempted) in zip(pending, results):
+                if not attempted:
+                    resolved[url] = url
+                    deferred_count += 1
+                    continue
+                cursor.execute(
+                    "INSERT OR REPLACE INTO url_redirects (url, canonical_url, resolved_at) VALUES (?, ?, ?)",
+                    (url, target or '', now)
+                )
+                resolved[url] = target or url
+                failed_count += not target
+            conn.commit()
+            if failed_count:
+                print(f"  {failed_count} URLs could not be resolved (retry after {FAILED_RETRY_AFTER}).")
+            if deferred_count:
+                print(f"  {deferred_count} URLs deferred to the next run (throttled or circuit open).")
+
+    return resolved